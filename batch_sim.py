@@ -0,0 +1,135 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bots import BOTS
+from game_state import GameConfig, GameState
+
+# Plays many headless games for every combination in a grid of GameConfig
+# settings and reports how long a bot survives with each one, e.g.
+#
+#   python batch_sim.py --grid poop_speed=8,10,12 --grid poop_spawn_rate=10,20 \
+#       --bot dodge --games 2000 --workers 32 --json results.json
+#
+# Every game is seeded from (seed, config, game number) alone, so results are
+# the same however the games get spread over the worker processes.
+
+TUNABLE = ("poop_speed", "poop_spawn_rate", "min_active_poops", "max_active_poops",
+           "collision_margin", "player_speed", "poop_size", "player_size")
+
+def parse_grid(entries):
+    # ["poop_speed=8,10", "poop_spawn_rate=20"] -> [{"poop_speed": 8, ...}, ...]
+    axes = []
+    for entry in entries:
+        name, _, values = entry.partition("=")
+        if name not in TUNABLE or not values:
+            raise ValueError(f"Bad grid entry {entry!r}, expected one of {', '.join(TUNABLE)} as name=v1,v2,...")
+        axes.append([(name, int(value)) for value in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+def game_seed(seed, config_index, game_index):
+    return f"{seed}:{config_index}:{game_index}"
+
+def play_game(settings, bot_name, seed, max_ticks):
+    state = GameState(GameConfig(**settings), seed=seed)
+    bot = BOTS[bot_name](random.Random(f"{seed}:bot"))
+    while state.ticks < max_ticks:
+        if state.step(bot(state)):
+            break
+    return state.ticks
+
+def run_chunk(settings, bot_name, seed, config_index, first_game, count, max_ticks):
+    # Worker entry point: plays games [first_game, first_game + count) of one config
+    return [play_game(settings, bot_name, game_seed(seed, config_index, game_index), max_ticks)
+            for game_index in range(first_game, first_game + count)]
+
+def summarize(settings, ticks, tick_rate, max_ticks):
+    times = sorted(tick / tick_rate for tick in ticks)
+    if len(times) > 1:
+        deciles = statistics.quantiles(times, n=10, method="inclusive")
+    else:
+        deciles = times * 9
+    return {
+        "config": settings,
+        "games": len(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.pstdev(times),
+        "min": times[0],
+        "p10": deciles[0],
+        "p50": deciles[4],
+        "p90": deciles[8],
+        "max": times[-1],
+        "capped": sum(1 for tick in ticks if tick >= max_ticks),  # Games stopped at max_ticks
+    }
+
+def run_batch(grid, bot_name="dodge", games=1000, seed=0, workers=None, max_seconds=600, chunk_size=50):
+    tick_rate = GameConfig().tick_rate
+    max_ticks = int(max_seconds * tick_rate)
+    results = {index: [] for index in range(len(grid))}
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for config_index, settings in enumerate(grid):
+            for first_game in range(0, games, chunk_size):
+                count = min(chunk_size, games - first_game)
+                future = executor.submit(run_chunk, settings, bot_name, seed, config_index,
+                                         first_game, count, max_ticks)
+                futures[future] = (config_index, first_game)
+        
+        # Keep chunks in game order so the raw tick lists are reproducible too
+        chunks = {}
+        for future, (config_index, first_game) in futures.items():
+            chunks[(config_index, first_game)] = future.result()
+        for (config_index, _), ticks in sorted(chunks.items()):
+            results[config_index].extend(ticks)
+    
+    return [summarize(settings, results[index], tick_rate, max_ticks) for index, settings in enumerate(grid)]
+
+def print_report(summaries):
+    header = f"{'config':<48} {'games':>6} {'mean':>7} {'p10':>7} {'p50':>7} {'p90':>7} {'max':>7} {'capped':>6}"
+    print(header)
+    print("-" * len(header))
+    for summary in summaries:
+        config = " ".join(f"{name}={value}" for name, value in summary["config"].items()) or "(defaults)"
+        print(f"{config:<48} {summary['games']:>6} {summary['mean']:>7.1f} {summary['p10']:>7.1f} "
+              f"{summary['p50']:>7.1f} {summary['p90']:>7.1f} {summary['max']:>7.1f} {summary['capped']:>6}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep difficulty settings with headless bot games.")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help=f"Setting to sweep, repeatable. One of: {', '.join(TUNABLE)}")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="dodge")
+    parser.add_argument("--games", type=int, default=1000, help="Games per configuration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-seconds", type=float, default=600, help="Stop a game after this much game time")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Games handed to a worker at once")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+    
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    start = time.perf_counter()
+    summaries = run_batch(grid, args.bot, args.games, args.seed, args.workers, args.max_seconds, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    
+    print_report(summaries)
+    print(f"\n{len(grid) * args.games} games in {elapsed:.1f}s")
+    
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"bot": args.bot, "seed": args.seed, "games": args.games,
+                       "max_seconds": args.max_seconds, "results": summaries}, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
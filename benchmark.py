@@ -0,0 +1,271 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Benchmarks for the hot paths, so regressions show up between releases:
+#
+#   simulation   GameState ticks per second with 10 to 10,000 falling poops
+#   drawing      draw_player / draw_poop calls per second
+#   ranking      get_high_scores / save_score latency on 1k to 1M line files
+#
+#   python benchmark.py --output bench.json
+#   python benchmark.py --baseline bench-previous.json    exit 1 on a regression
+#   python benchmark.py --check-stores                    both poop stores play the same game
+#
+# Runs headless with the SDL dummy video driver unless another one is set.
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game_state import GameConfig, GameState, INPUT_LEFT, INPUT_RIGHT
+from binary_ranking import BinaryLeaderboard, text_to_binary
+from leaderboard import Leaderboard
+
+POOP_COUNTS = (10, 100, 1000, 10000)
+RANKING_SIZES = (1000, 10000, 100000, 1000000)
+RESULTS_VERSION = 1
+
+def rate(function, min_time):
+    # Calls per second, calling function until min_time seconds have passed
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+
+def latency(function, repeats):
+    # Median and worst time of a single call, in milliseconds
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(times), "max_ms": max(times)}
+
+def available_stores():
+    if importlib.util.find_spec("numpy") is None:
+        return ("list",)
+    return ("list", "array")
+
+def check_store_parity(count=50, ticks=600, seed=0):
+    # Both poop stores have to play the same game: with one seed and one
+    # input log, the same poops in the same places after every tick.
+    # Raises RuntimeError at the first tick where they differ.
+    rng = random.Random(seed)
+    inputs = [rng.choice((0, INPUT_LEFT, INPUT_RIGHT)) for _ in range(ticks)]
+    states = [GameState(GameConfig(min_active_poops=count, max_active_poops=count, poop_store=store), seed=seed)
+              for store in ("list", "array")]
+    for tick, keys in enumerate(inputs):
+        for state in states:
+            state.game_over = False  # Keep both going past collisions
+            state.step(keys)
+        listed, arrayed = (sorted(state.poops.positions()) for state in states)
+        if not len(listed) == len(arrayed) == count:
+            raise RuntimeError(f"tick {tick}: list store has {len(listed)} poops, array store {len(arrayed)}, "
+                               f"expected {count}")
+        for a, b in zip(listed, arrayed):
+            if not all(abs(p - q) < 1e-6 for p, q in zip(a, b)):
+                raise RuntimeError(f"tick {tick}: poop at {a} in the list store, {b} in the array store")
+
+def bench_simulation(counts=POOP_COUNTS, stores=None, min_time=1.0):
+    results = []
+    for store in stores or available_stores():
+        for count in counts:
+            config = GameConfig(min_active_poops=count, max_active_poops=count, poop_store=store)
+            state = GameState(config, seed=0)
+            
+            def tick():
+                # Run back and forth across the screen. Collisions are still
+                # checked every tick, they just never end the game.
+                state.game_over = False
+                state.step(INPUT_LEFT if state.ticks // 90 % 2 else INPUT_RIGHT)
+            
+            # Let the first wave fall onto the screen before timing
+            for _ in range(120):
+                tick()
+            # A row is only worth publishing if it measured the poop count it
+            # claims; checked even under python -O
+            if len(state.poops) != count:
+                raise RuntimeError(f"{store} store holds {len(state.poops)} poops after warm-up, expected {count}")
+            results.append({"store": store, "poops": count, "ticks_per_second": rate(tick, min_time)})
+    return results
+
+def bench_drawing(min_time=1.0):
+    import pygame
+    import poop_dodge_game as game
+    
+    game.init_display()
+    player = GameState(seed=0).player
+    position = {"x": 0.0, "rotation": 0.0, "tick": 0}
+    
+    def player_frame():
+        # Run back and forth through the animation like a held arrow key does
+        position["tick"] += 1
+        inputs = INPUT_RIGHT if position["tick"] // 90 % 2 else INPUT_LEFT
+        player.prev_x = player.x
+        player.move("right" if inputs == INPUT_RIGHT else "left")
+        player.animate(inputs)
+        game.draw_player(player, 0.5)
+    
+    def poop_frame():
+        position["x"] = (position["x"] + 13) % (game.SCREEN_WIDTH - game.POOP_SIZE)
+        position["rotation"] += 2.7
+        game.draw_poop(position["x"], 200, position["rotation"])
+    
+    # Warm the sprite caches first; steady-state drawing is what gets measured
+    for _ in range(game.PLAYER_ANIMATION_FRAMES * 10):
+        player_frame()
+    for _ in range(game.POOP_ROTATION_STEPS * 10):
+        poop_frame()
+    results = {
+        "draw_player_per_second": rate(player_frame, min_time),
+        "draw_poop_per_second": rate(poop_frame, min_time),
+    }
+    pygame.quit()
+    return results
+
+def write_ranking(path, lines, rng):
+    # A compacted ranking file, best score first, like the game leaves behind
+    scores = sorted((rng.uniform(0, 120) for _ in range(lines)), reverse=True)
+    with open(path, "w") as file:
+        for index, score in enumerate(scores):
+            file.write(f"player{index % 10000},{score}\n")
+
+def bench_ranking(sizes=RANKING_SIZES, repeats=5):
+    results = []
+    rng = random.Random(0)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            text_path = os.path.join(directory, "ranking.txt")
+            write_ranking(text_path, size, rng)
+            binary_path = os.path.join(directory, "ranking.bin")
+            text_to_binary(text_path, binary_path)
+            
+            for file_format, path, leaderboard_class in (("text", text_path, Leaderboard),
+                                                         ("binary", binary_path, BinaryLeaderboard)):
+                start = time.perf_counter()
+                leaderboard = leaderboard_class(path, compact_every=0)  # No background compaction mid-run
+                load_ms = (time.perf_counter() - start) * 1000
+                
+                results.append({
+                    "format": file_format,
+                    "lines": size,
+                    "load_ms": load_ms,
+                    "get_high_scores": latency(leaderboard.get_scores, repeats),
+                    "top5": latency(lambda: leaderboard.top(5), repeats),
+                    "rank": latency(lambda: leaderboard.rank(rng.uniform(0, 120)), repeats),
+                    "save_score": latency(lambda: leaderboard.add("bench", rng.uniform(0, 120)), repeats),
+                })
+    return results
+
+def metrics(results):
+    # Flattens a results file into {name: (value, higher_is_better)}
+    flat = {}
+    for entry in results.get("simulation", []):
+        flat[f"simulation/{entry['store']}/{entry['poops']}"] = (entry["ticks_per_second"], True)
+    for name, value in results.get("drawing", {}).items():
+        flat[f"drawing/{name}"] = (value, True)
+    for entry in results.get("ranking", []):
+        prefix = "ranking" if entry.get("format", "text") == "text" else f"ranking-{entry['format']}"
+        flat[f"{prefix}/{entry['lines']}/load_ms"] = (entry["load_ms"], False)
+        for operation in ("get_high_scores", "top5", "rank", "save_score"):
+            if operation in entry:
+                flat[f"{prefix}/{entry['lines']}/{operation}_ms"] = (entry[operation]["median_ms"], False)
+    return flat
+
+def compare(results, baseline, tolerance):
+    # Names of the metrics that got worse than the baseline by more than tolerance
+    regressions = []
+    old = metrics(baseline)
+    for name, (value, higher_is_better) in metrics(results).items():
+        if name not in old or not old[name][0]:
+            continue
+        change = value / old[name][0] - 1
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append((name, old[name][0], value, change))
+    return regressions
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+    try:
+        import pygame
+        info["pygame"] = pygame.version.ver
+    except ImportError:
+        info["pygame"] = None
+    try:
+        import numpy
+        info["numpy"] = numpy.__version__
+    except ImportError:
+        info["numpy"] = None
+    return info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation, drawing and leaderboard I/O.")
+    parser.add_argument("--only", choices=("simulation", "drawing", "ranking"), action="append",
+                        help="Run only these benchmarks (repeatable)")
+    parser.add_argument("--poops", type=lambda value: [int(n) for n in value.split(",")], default=POOP_COUNTS,
+                        metavar="N1,N2", help="Poop counts for the simulation benchmark")
+    parser.add_argument("--lines", type=lambda value: [int(n) for n in value.split(",")], default=RANKING_SIZES,
+                        metavar="N1,N2", help="Ranking file sizes for the leaderboard benchmark")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds spent on each throughput measurement")
+    parser.add_argument("--repeats", type=int, default=5, help="Calls timed per leaderboard operation")
+    parser.add_argument("--output", metavar="PATH", default="benchmark.json", help="Where to write the results")
+    parser.add_argument("--baseline", metavar="PATH", help="Earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before it counts as a regression")
+    parser.add_argument("--check-stores", action="store_true",
+                        help="Check that the list and array poop stores play the same game, instead of benchmarking")
+    args = parser.parse_args(argv)
+    only = set(args.only or ("simulation", "drawing", "ranking"))
+    
+    if args.check_stores:
+        if "array" not in available_stores():
+            print("Only the list store is available (numpy is not installed), nothing to compare")
+            return 0
+        try:
+            check_store_parity()
+        except RuntimeError as e:
+            print(f"Poop stores differ: {e}")
+            return 1
+        print("Poop stores match")
+        return 0
+    
+    results = {"version": RESULTS_VERSION, "timestamp": time.time(), "environment": environment()}
+    if "simulation" in only:
+        results["simulation"] = bench_simulation(args.poops, min_time=args.min_time)
+        for entry in results["simulation"]:
+            print(f"simulation  {entry['store']:<5} {entry['poops']:>6} poops  {entry['ticks_per_second']:>12,.0f} ticks/s")
+    if "drawing" in only:
+        results["drawing"] = bench_drawing(args.min_time)
+        for name, value in results["drawing"].items():
+            print(f"drawing     {name:<26} {value:>12,.0f}")
+    if "ranking" in only:
+        results["ranking"] = bench_ranking(args.lines, args.repeats)
+        for entry in results["ranking"]:
+            print(f"ranking     {entry['format']:<6} {entry['lines']:>8,} lines  load {entry['load_ms']:8.1f} ms  "
+                  f"get_high_scores {entry['get_high_scores']['median_ms']:8.2f} ms  "
+                  f"save_score {entry['save_score']['median_ms']:6.2f} ms")
+    
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:,.2f} -> {new:,.2f} ({change:+.0%})")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
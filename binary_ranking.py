@@ -0,0 +1,279 @@
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from leaderboard import Leaderboard
+
+# Fixed-width binary ranking file, an optional alternative to ranking.txt
+# (POOP_RANKING_FORMAT=binary). Nothing has to be parsed: the file is
+# memory-mapped, records are unpacked straight from the map, and since they
+# are stored best score first, the top entries are the first few records
+# and a rank is a binary search, touching only the pages it needs.
+#
+# File layout (little endian):
+#   header   magic "PDRB", version u8, 3 pad bytes, sorted record count u64
+#   records  name (UTF-8, NUL padded to 40 bytes), score f64
+#
+# Version 1 files had 10-byte names, which cut non-ASCII nicknames short.
+# They are still read, and rewritten as version 2 when a leaderboard opens
+# them.
+#
+# The first `count` records are sorted, highest score first. New scores are
+# appended after them, unsorted, like the text log, and compact() merges
+# them in.
+#
+#   python binary_ranking.py to-binary ranking.txt ranking.bin
+#   python binary_ranking.py to-text ranking.bin ranking.txt
+
+MAGIC = b"PDRB"
+VERSION = 2
+HEADER = struct.Struct("<4sB3xQ")
+RECORDS = {1: struct.Struct("<10sd"), 2: struct.Struct("<40sd")}  # Record layout by file version
+RECORD = RECORDS[VERSION]
+NAME_LENGTH = 10  # Characters, same limit as nickname entry; 40 bytes fit any 10 in UTF-8
+
+def pack_record(name, score):
+    return RECORD.pack(name[:NAME_LENGTH].encode(), score)
+
+def unpack_name(raw):
+    return raw.rstrip(b"\0").decode(errors="replace")
+
+class BinaryLeaderboard(Leaderboard):
+    def __init__(self, path, size=5, check_interval=1.0, compact_every=100):
+        self._map = None
+        self._layout = RECORD  # Record layout of the open file
+        self._sorted_count = 0  # Records in the sorted part of the file
+        self._appended = []  # (name, score) records after the sorted part, in file order
+        # Appends and the compaction rename take this instead of self._lock,
+        # so lookups from the game never wait for a slow write to finish
+        self._write_lock = threading.Lock()
+        super().__init__(path, size, check_interval, compact_every)
+        if self._layout is not RECORD:
+            self.compact()  # Upgrade an old file before appending anything to it
+    
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+    
+    def reload(self):
+        with self._lock:
+            self._close_map()
+            self._layout = RECORD
+            self._sorted_count = 0
+            self._appended = []
+            self._top_sorted = None
+            self._pending = 0
+            self._signature = self._stat_signature()
+            self._last_check = time.monotonic()
+            if not self._signature or self._signature[1] < HEADER.size:
+                return
+            try:
+                with open(self.path, "rb") as file:
+                    self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, count = HEADER.unpack_from(self._map)
+                if magic != MAGIC or version not in RECORDS:
+                    raise ValueError("not a binary ranking file")
+                self._layout = RECORDS[version]
+                # A partial record at the end is a torn append from a crash
+                total = (len(self._map) - HEADER.size) // self._layout.size
+                self._sorted_count = min(count, total)
+                for index in range(self._sorted_count, total):
+                    name, score = self._record(index)
+                    self._appended.append((name, score))
+                self._pending = len(self._appended)
+            except Exception as e:
+                print(f"Error reading scores: {e}")
+                self._close_map()
+                self._layout = RECORD
+                self._sorted_count = 0
+                self._appended = []
+    
+    def refresh(self):
+        # Not while a record is being appended either: it is in the file
+        # before it is in memory, and would be picked up twice
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            return super().refresh()
+        finally:
+            self._write_lock.release()
+    
+    def _record(self, index):
+        raw_name, score = self._layout.unpack_from(self._map, HEADER.size + index * self._layout.size)
+        return unpack_name(raw_name), score
+    
+    def _score(self, index):
+        return self._layout.unpack_from(self._map, HEADER.size + index * self._layout.size)[1]
+    
+    def top(self, count=None):
+        # Highest first; earlier records win ties, like the text leaderboard
+        self.refresh()
+        with self._lock:
+            if self._top_sorted is None:
+                head = [self._record(index) for index in range(min(self.size, self._sorted_count))]
+                entries = [(-score, order, name) for order, (name, score) in enumerate(head)]
+                entries += [(-score, self._sorted_count + order, name)
+                            for order, (name, score) in enumerate(self._appended)]
+                self._top_sorted = [(name, -score) for score, _, name in heapq.nsmallest(self.size, entries)]
+            top = self._top_sorted
+        if count is None:
+            return top
+        return top[:count]
+    
+    def rank(self, score):
+        # 1-based place a score has among all recorded scores (ties share a place)
+        self.refresh()
+        with self._lock:
+            # Sorted part is descending: find the first record not above score
+            low, high = 0, self._sorted_count
+            while low < high:
+                middle = (low + high) // 2
+                if self._score(middle) > score:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low + sum(1 for _, other in self._appended if other > score) + 1
+    
+    def count(self):
+        return self._sorted_count + len(self._appended)
+    
+    def get_scores(self):
+        # Full ranking, highest first. Only the raw bytes are copied while
+        # holding the lock; unpacking them doesn't block anyone.
+        self.refresh()
+        with self._lock:
+            data = b""
+            if self._map is not None:
+                data = self._map[HEADER.size:HEADER.size + self._sorted_count * self._layout.size]
+            layout = self._layout
+            appended = list(self._appended)
+        sorted_part = [(unpack_name(name), score) for name, score in layout.iter_unpack(data)]
+        if not appended:
+            return sorted_part
+        appended.sort(key=lambda x: x[1], reverse=True)
+        return list(heapq.merge(sorted_part, appended, key=lambda x: x[1], reverse=True))
+    
+    def add_many(self, records):
+        # Saves several (name, score) records with a single append and fsync;
+        # returns the rank each one got. Raises if they didn't reach the
+        # file, without adding them to memory either.
+        self.refresh()
+        # Names as they will read back from the file
+        records = [(name[:NAME_LENGTH], score) for name, score in records]
+        
+        # The upgrade when the file was opened failed; nothing can be
+        # appended to an old format file, so try it again first
+        if self._layout is not RECORD:
+            self.compact()
+        
+        with self._write_lock:
+            self._append(records)
+            with self._lock:
+                self._appended.extend(records)
+                self._pending += len(records)
+                self._top_sorted = None
+        ranks = [self.rank(score) for _, score in records]
+        
+        if self.compact_every and self._pending >= self.compact_every:
+            self.compact_in_background()
+        return ranks
+    
+    def _append(self, records):
+        expected_size = self._signature[1] if self._signature else 0
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size_before = os.fstat(fd).st_size
+            if size_before >= HEADER.size and self._layout is not RECORD:
+                raise ValueError("ranking file is in an old format, compact it first")
+            if size_before < HEADER.size:
+                # New (or cut short) file: start it with an empty sorted part
+                os.ftruncate(fd, 0)
+                os.write(fd, HEADER.pack(MAGIC, VERSION, 0))
+            else:
+                # Drop a record that was cut short by a crash before adding ours
+                torn = (size_before - HEADER.size) % RECORD.size
+                if torn:
+                    os.ftruncate(fd, size_before - torn)
+            os.write(fd, b"".join(pack_record(name, score) for name, score in records))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        
+        # Our own write shouldn't trigger a reload, but one from another
+        # process in between should
+        if size_before == expected_size:
+            self._signature = self._stat_signature()
+    
+    def compact(self):
+        # The merged file is written without holding the lock, so lookups
+        # only wait for the final rename
+        tmp_path = self.path + ".compact"
+        for _ in range(3):
+            with self._write_lock, self._lock:
+                # Reload first so records appended by other processes are kept
+                self.reload()
+                signature = self._signature
+            try:
+                write_binary(tmp_path, self.get_scores())
+                with self._write_lock, self._lock:
+                    # Somebody appended while we were writing, start over
+                    if self._stat_signature() != signature:
+                        continue
+                    
+                    self._close_map()
+                    os.replace(tmp_path, self.path)
+                    self._fsync_directory()
+                    self.reload()
+                    return True
+            except Exception as e:
+                print(f"Error compacting scores: {e}")
+                return False
+        return False
+
+def write_binary(path, records):
+    # records must already be sorted, highest score first
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for name, score in records:
+            file.write(pack_record(name, score))
+        file.flush()
+        os.fsync(file.fileno())
+
+def text_to_binary(text_path, binary_path):
+    records = Leaderboard(text_path, compact_every=0).get_scores()
+    tmp_path = binary_path + ".tmp"
+    write_binary(tmp_path, records)
+    os.replace(tmp_path, binary_path)
+    return len(records)
+
+def binary_to_text(binary_path, text_path):
+    records = BinaryLeaderboard(binary_path, compact_every=0).get_scores()
+    tmp_path = text_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        for name, score in records:
+            file.write(f"{name},{score}\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, text_path)
+    return len(records)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert rankings between the text and binary formats.")
+    parser.add_argument("command", choices=("to-binary", "to-text"))
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args(argv)
+    
+    convert = text_to_binary if args.command == "to-binary" else binary_to_text
+    count = convert(args.source, args.destination)
+    print(f"Wrote {count} scores to {args.destination}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
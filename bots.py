@@ -0,0 +1,68 @@
+from game_state import INPUT_LEFT, INPUT_RIGHT
+
+# Scripted players that turn a GameState into inputs for the next tick.
+# Each bot is created per game with its own random generator, so a game
+# played by a bot is reproducible from the seed alone.
+
+class IdleBot:
+    # Never moves; the baseline every difficulty setting should beat
+    def __init__(self, rng):
+        self.random = rng
+    
+    def __call__(self, state):
+        return 0
+
+class RandomBot:
+    # Runs in one direction for a while, then picks a new one
+    def __init__(self, rng, change_chance=0.05):
+        self.random = rng
+        self.change_chance = change_chance
+        self.inputs = 0
+    
+    def __call__(self, state):
+        if self.random.random() < self.change_chance:
+            self.inputs = self.random.choice((0, INPUT_LEFT, INPUT_RIGHT))
+        return self.inputs
+
+class DodgeBot:
+    # Steps away from the closest poop that is about to land on the player
+    def __init__(self, rng, lookahead=12):
+        self.random = rng
+        self.lookahead = lookahead  # Ticks ahead to look for falling poops
+    
+    def __call__(self, state):
+        player = state.player
+        config = state.config
+        size = config.poop_size
+        player_center = player.x + player.width / 2
+        reach = (player.width + size) / 2 + config.player_speed
+        
+        threat = None
+        for x, y, _ in state.poops.positions():
+            # Only poops that will reach the player's row soon and overlap its column
+            ticks_away = (player.y - (y + size)) / config.poop_speed
+            if ticks_away > self.lookahead or y > player.y + player.height:
+                continue
+            center = x + size / 2
+            if abs(center - player_center) >= reach:
+                continue
+            if threat is None or y > threat[1]:
+                threat = (center, y)
+        
+        if threat is None:
+            return 0
+        
+        # Run away from it, unless a wall is in the way
+        if threat[0] < player_center:
+            if player.x >= config.screen_width - player.width:
+                return INPUT_LEFT
+            return INPUT_RIGHT
+        if player.x <= 0:
+            return INPUT_RIGHT
+        return INPUT_LEFT
+
+BOTS = {
+    "idle": IdleBot,
+    "random": RandomBot,
+    "dodge": DodgeBot,
+}
@@ -0,0 +1,39 @@
+import pygame
+
+# Redraws only the parts of the screen that changed. Everything drawn through
+# it is assumed to sit on a plain background, so clearing last frame's rects
+# and drawing this frame's is enough to keep the screen correct.
+class DirtyRectRenderer:
+    def __init__(self, surface, background, enabled=True):
+        self.surface = surface
+        self.background = background
+        self.enabled = enabled  # When off, every frame is a full fill + flip
+        self._previous = []  # Rects drawn last frame
+        self._current = []  # Rects drawn so far this frame
+        self._full_redraw = True
+    
+    def invalidate(self):
+        # Something else drew over the screen, start over with a full frame
+        self._full_redraw = True
+    
+    def begin_frame(self):
+        if self._full_redraw or not self.enabled:
+            self.surface.fill(self.background)
+        else:
+            for rect in self._previous:
+                self.surface.fill(self.background, rect)
+        self._current = []
+    
+    def add(self, rect):
+        if rect:
+            self._current.append(rect)
+    
+    def present(self):
+        if self._full_redraw or not self.enabled:
+            pygame.display.flip()
+            self._full_redraw = False
+        else:
+            # Push both where things were (now cleared) and where they are now
+            pygame.display.update(self._previous + self._current)
+        self._previous = self._current
+        self._current = []
@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from bots import BOTS
+from game_state import GameConfig, GameState
+
+# Server-authoritative games for tournament mode: one process hosts hundreds
+# of sessions, one per connection. Clients send their keys, the host runs
+# the game and streams back what changed. One JSON object per line:
+#
+#   client -> host
+#     {"op": "start"}                 new game (also after game over)
+#     {"op": "input", "keys": 2}      INPUT_LEFT / INPUT_RIGHT bitmask held from now on
+#     {"op": "stats"}                 host load, see below
+#
+#   host -> client
+#     {"op": "start", "seed": ..., "config": {...}}
+#     {"t": 130, "x": 383, "d": -1, "new": [[7, 120, -30, 4.2, 2.1]], "gone": [3]}
+#     {"t": 912, "over": 15.2}
+#
+# A diff carries only what changed at tick t: the player's x and running
+# direction d, poops that appeared as [id, x, y, rotation, rotation_speed]
+# and ids of poops that are gone. Poops fall poop_speed and turn
+# rotation_speed every tick, so the client moves them itself; ticks where
+# nothing else changed send nothing at all.
+#
+# Every session is stepped by one tick loop, batch_size sessions at a time
+# with a yield to the event loop in between, so input keeps being read while
+# hundreds of games run. A key pressed and released between two ticks still
+# counts for one tick, like in the local game.
+#
+#   python game_host.py --port 5060 --workers 4     one host process per core
+#   python game_host.py --bench 500                 sessions per core with bot players
+
+DEFAULT_PORT = 5060
+MAX_SEND_BUFFER = 1 << 20  # Clients this far behind reading their diffs get dropped
+MAX_TICKS_BEHIND = 5  # Ticks the loop catches up on before it drops the backlog
+
+def encode(message):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+class Session:
+    def __init__(self, send, config, seed=None):
+        self.send = send  # Takes the bytes of one or more messages
+        self.state = GameState(config)
+        self.seed = seed  # Fixed seed for every game (same course for all players), or None
+        self.playing = False
+        self.held = 0  # Keys down right now
+        self.tapped = 0  # Keys pressed since the last tick, even if released again
+        self._sent_poops = {}  # Poop -> (id, y) as the client last knew it
+        self._next_id = 0
+        self._sent_x = None
+        self._sent_direction = None
+    
+    def start(self):
+        self.state.reset(self.seed if self.seed is not None else random.getrandbits(64))
+        self.playing = True
+        self.tapped = 0
+        self._sent_poops = {}
+        self._sent_x = None
+        self._sent_direction = None
+        self.send(encode({"op": "start", "seed": self.state.seed, "config": vars(self.state.config)}))
+        self.send(encode(self.diff()))
+    
+    def set_input(self, keys):
+        self.held = keys
+        self.tapped |= keys
+    
+    def step(self):
+        # One tick; returns the message for it, or None if nothing changed
+        inputs = self.held | self.tapped
+        self.tapped = 0
+        if self.state.step(inputs):
+            self.playing = False
+            return {"t": self.state.ticks, "over": self.state.survival_time}
+        message = self.diff()
+        if len(message) == 1:
+            return None
+        return message
+    
+    def diff(self):
+        state = self.state
+        player = state.player
+        message = {"t": state.ticks}
+        if player.x != self._sent_x:
+            message["x"] = self._sent_x = player.x
+        if player.direction != self._sent_direction:
+            message["d"] = self._sent_direction = player.direction
+        
+        # Pooled Poop objects get reused, so an object the client already
+        # knows is only the same poop if it fell exactly one step since
+        new = []
+        current = {}
+        for poop in state.poops.poops:
+            sent = self._sent_poops.get(poop)
+            if sent is not None and poop.y == sent[1] + poop.speed:
+                current[poop] = (sent[0], poop.y)
+            else:
+                current[poop] = (self._next_id, poop.y)
+                new.append([self._next_id, poop.x, poop.y, round(poop.rotation, 2), round(poop.rotation_speed, 2)])
+                self._next_id += 1
+        gone = [poop_id for poop, (poop_id, _) in self._sent_poops.items()
+                if current.get(poop, (None,))[0] != poop_id]
+        self._sent_poops = current
+        if new:
+            message["new"] = new
+        if gone:
+            message["gone"] = gone
+        return message
+
+class GameHost:
+    def __init__(self, config=None, seed=None, batch_size=64, stats_window=5.0):
+        # Diffs follow Poop objects, so sessions always use the list store.
+        # That goes in a copy; the caller's config is left as it was.
+        self.config = GameConfig(**dict(vars(config or GameConfig()), poop_store="list"))
+        self.seed = seed
+        self.batch_size = batch_size
+        self.tick_duration = 1.0 / self.config.tick_rate
+        self.sessions = []
+        self.stats_window = stats_window  # Seconds load is averaged over
+        self._window_start = time.perf_counter()
+        self._busy = 0.0  # Seconds spent stepping sessions in this window
+        self._load = 0.0  # Busy fraction of the last full window
+    
+    def add_session(self, send):
+        session = Session(send, self.config, self.seed)
+        self.sessions.append(session)
+        return session
+    
+    def remove_session(self, session):
+        try:
+            self.sessions.remove(session)
+        except ValueError:
+            pass
+    
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, reuse_port=False):
+        server = await asyncio.start_server(self._handle_connection, host, port, reuse_port=reuse_port or None)
+        print(f"Game host listening on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+        async with server:
+            await self.run_ticks()
+    
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            await self.tick()
+            next_tick += self.tick_duration
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif -delay > MAX_TICKS_BEHIND * self.tick_duration:
+                # Can't keep up: games slow down instead of stepping in bursts
+                next_tick = loop.time()
+    
+    async def tick(self):
+        # Steps every playing session once, batch_size at a time
+        sessions = [session for session in self.sessions if session.playing]
+        for first in range(0, len(sessions), self.batch_size):
+            start = time.perf_counter()
+            for session in sessions[first:first + self.batch_size]:
+                message = session.step()
+                if message is not None:
+                    session.send(encode(message))
+            self._busy += time.perf_counter() - start
+            if first + self.batch_size < len(sessions):
+                await asyncio.sleep(0)  # Let input and new connections in between batches
+        self._update_load()
+    
+    def _update_load(self):
+        elapsed = time.perf_counter() - self._window_start
+        if elapsed >= self.stats_window:
+            self._load = self._busy / elapsed
+            self._busy = 0.0
+            self._window_start += elapsed
+    
+    def stats(self):
+        # Sessions per core: how many of today's games one core could run
+        # at full tick rate, going by the time stepping them takes
+        playing = sum(1 for session in self.sessions if session.playing)
+        per_core = playing / self._load if self._load else None
+        return {"sessions": len(self.sessions), "playing": playing, "load": self._load, "sessions_per_core": per_core}
+    
+    async def _handle_connection(self, reader, writer):
+        def send(data):
+            if writer.is_closing():
+                return
+            if writer.transport.get_write_buffer_size() > MAX_SEND_BUFFER:
+                writer.close()
+                return
+            writer.write(data)
+        
+        session = self.add_session(send)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                    if op == "input":
+                        session.set_input(int(request["keys"]))
+                    elif op == "start":
+                        session.start()
+                    elif op == "stats":
+                        send(encode(dict(self.stats(), op="stats")))
+                    else:
+                        raise ValueError(f"Unknown op {op!r}")
+                except Exception as e:
+                    send(encode({"error": str(e)}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.remove_session(session)
+            writer.close()
+
+def bench(sessions, seconds=5.0, bot_name="dodge", batch_size=64):
+    # Hosts bot-played sessions in this process, stepping ticks back to
+    # back, and measures the host's side only: bots pick their inputs
+    # outside the timed part, and diffs are encoded but not sent anywhere
+    host = GameHost(batch_size=batch_size)
+    sent = [0]
+    
+    def send(data):
+        sent[0] += len(data)
+    
+    players = []
+    for index in range(sessions):
+        session = host.add_session(send)
+        session.start()
+        players.append((session, BOTS[bot_name](random.Random(index))))
+    
+    async def run():
+        ticks = 0
+        host_time = 0.0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for session, bot in players:
+                if not session.playing:
+                    session.start()
+                session.set_input(bot(session.state))
+            start = time.process_time()
+            await host.tick()
+            host_time += time.process_time() - start
+            ticks += 1
+        return ticks, host_time
+    
+    ticks, host_time = asyncio.run(run())
+    game_seconds = ticks / host.config.tick_rate
+    return {
+        "sessions": sessions,
+        "ticks": ticks,
+        "host_cpu_seconds": host_time,
+        "sessions_per_core": sessions * game_seconds / host_time if host_time else None,
+        "bytes_per_session_second": sent[0] / sessions / game_seconds if game_seconds else 0,
+    }
+
+def run_host(host, port, seed, batch_size, reuse_port):
+    try:
+        asyncio.run(GameHost(seed=seed, batch_size=batch_size).serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many server-side game sessions for networked play.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (0.0.0.0 for the whole LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Host processes sharing the port, one per core (needs SO_REUSEPORT)")
+    parser.add_argument("--seed", type=int, default=None, help="Same seed for every game, e.g. for a tournament round")
+    parser.add_argument("--batch-size", type=int, default=64, help="Sessions stepped between event loop yields")
+    parser.add_argument("--bench", type=int, metavar="SESSIONS", help="Measure sessions per core instead of serving")
+    parser.add_argument("--seconds", type=float, default=5.0, help="How long --bench runs")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="dodge", help="Who plays the --bench sessions")
+    args = parser.parse_args(argv)
+    
+    if args.bench:
+        result = bench(args.bench, args.seconds, args.bot, args.batch_size)
+        print(f"{result['sessions']} sessions, {result['ticks']} ticks in {result['host_cpu_seconds']:.2f}s host CPU: "
+              f"{result['sessions_per_core']:,.0f} sessions per core, "
+              f"{result['bytes_per_session_second']:,.0f} bytes/s per session")
+        return 0
+    
+    if args.workers == 1:
+        run_host(args.host, args.port, args.seed, args.batch_size, False)
+        return 0
+    workers = [multiprocessing.Process(target=run_host, args=(args.host, args.port, args.seed, args.batch_size, True))
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import random
+
+from poop_store import PoopStore
+
+# Game rules and simulation, with no display, fonts or clock. poop_dodge_game
+# draws a GameState and feeds it keyboard input; anything else (tests, bots,
+# replays) can step one directly as fast as the CPU allows.
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PLAYER_SIZE = 50
+POOP_SIZE = 40
+PLAYER_SPEED = 8
+POOP_SPEED = 10  # 2x faster than original (was 5)
+POOP_SPAWN_RATE = 20  # New poop every 20 ticks (1/3 second)
+MIN_ACTIVE_POOPS = 5  # Minimum number of active poops
+MAX_ACTIVE_POOPS = 10  # Maximum number of active poops at once
+COLLISION_MARGIN = 10  # Hitboxes are shrunk by this much on every side
+TICK_RATE = 60  # Simulation ticks per second; speeds above are per tick
+
+# Inputs for one tick, as a bitmask
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+# Everything that can be tuned per game. Defaults are the normal game.
+class GameConfig:
+    def __init__(self, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 player_size=PLAYER_SIZE, poop_size=POOP_SIZE,
+                 player_speed=PLAYER_SPEED, poop_speed=POOP_SPEED,
+                 poop_spawn_rate=POOP_SPAWN_RATE, min_active_poops=MIN_ACTIVE_POOPS,
+                 max_active_poops=MAX_ACTIVE_POOPS, collision_margin=COLLISION_MARGIN,
+                 tick_rate=TICK_RATE, poop_store="list"):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.player_size = player_size
+        self.poop_size = poop_size
+        self.player_speed = player_speed
+        self.poop_speed = poop_speed
+        self.poop_spawn_rate = poop_spawn_rate
+        self.min_active_poops = min_active_poops
+        self.max_active_poops = max_active_poops
+        self.collision_margin = collision_margin
+        self.tick_rate = tick_rate
+        self.poop_store = poop_store  # "list" of Poop objects or numpy "array" store
+
+class Player:
+    def __init__(self, config):
+        self.config = config
+        self.width = config.player_size
+        self.height = config.player_size
+        self.x = config.screen_width // 2 - self.width // 2
+        self.y = config.screen_height - self.height - 10
+        self.prev_x = self.x  # Position at the previous tick, for interpolated drawing
+        self.speed = config.player_speed
+        self.animation_frame = 0
+        self.animation_speed = 0.2
+        self.direction = 0  # 0 = stationary, -1 = left, 1 = right
+    
+    def move(self, direction):
+        if direction == "left" and self.x > 0:
+            self.x -= self.speed
+        if direction == "right" and self.x < self.config.screen_width - self.width:
+            self.x += self.speed
+    
+    def animate(self, inputs):
+        # Running animation, advanced once per tick while a direction is held
+        if inputs & INPUT_LEFT:
+            self.direction = -1
+            self.animation_frame += self.animation_speed
+        elif inputs & INPUT_RIGHT:
+            self.direction = 1
+            self.animation_frame += self.animation_speed
+        else:
+            self.direction = 0
+            self.animation_frame = 0
+    
+    def reset(self):
+        self.x = self.config.screen_width // 2 - self.width // 2
+        self.prev_x = self.x
+        self.animation_frame = 0
+        self.direction = 0
+
+class Poop:
+    __slots__ = ("config", "random", "width", "height", "x", "y", "speed", "rotation", "rotation_speed")
+    
+    def __init__(self, config, rng=random):
+        self.config = config
+        self.random = rng
+        self.width = config.poop_size
+        self.height = config.poop_size
+        self.reset()
+        self.speed = config.poop_speed
+        self.rotation = 0
+        self.rotation_speed = self.random.uniform(-3, 3)  # Random rotation speed
+    
+    def move(self):
+        self.y += self.speed
+        self.rotation += self.rotation_speed
+    
+    def reset(self):
+        self.x = self.random.randint(0, self.config.screen_width - self.width)
+        self.y = -self.height
+        self.rotation = 0
+        self.rotation_speed = self.random.uniform(-3, 3)  # New random rotation speed
+    
+    def is_off_screen(self):
+        return self.y > self.config.screen_height
+
+def check_collision(player, poop, collision_margin=COLLISION_MARGIN):
+    # Use a slightly smaller collision box for better gameplay feel
+    if (player.x + collision_margin < poop.x + poop.width - collision_margin and
+        player.x + player.width - collision_margin > poop.x + collision_margin and
+        player.y + collision_margin < poop.y + poop.height - collision_margin and
+        player.y + player.height - collision_margin > poop.y + collision_margin):
+        return True
+    return False
+
+# Fixed set of Poop objects that get reset and reused instead of thrown away,
+# so a running game doesn't keep allocating new ones
+class PoopPool:
+    def __init__(self, capacity, config, rng=random):
+        self.capacity = capacity
+        self.free = [Poop(config, rng) for _ in range(capacity)]
+    
+    def acquire(self):
+        if not self.free:
+            return None
+        poop = self.free.pop()
+        poop.reset()
+        return poop
+    
+    def release(self, poop):
+        self.free.append(poop)
+
+# Active poops as a plain list of Poop objects. Same interface as PoopStore,
+# which is used instead when the config asks for the "array" store.
+#
+# Poops only ever fall straight down, so a poop's x is fixed from spawn to
+# removal. Each one is also filed into a column of a uniform grid by its x,
+# and collision checks only look at the columns a player could touch.
+class PoopList:
+    def __init__(self, config, rng=random):
+        self.pool = PoopPool(max(config.min_active_poops, config.max_active_poops), config, rng)
+        self.poops = []
+        self.poop_width = config.poop_size
+        self.column_width = config.poop_size
+        self.columns = [{} for _ in range(config.screen_width // self.column_width + 1)]  # Poop -> None
+    
+    def __len__(self):
+        return len(self.poops)
+    
+    def _column(self, x):
+        return min(max(int(x // self.column_width), 0), len(self.columns) - 1)
+    
+    def clear(self):
+        for poop in self.poops:
+            self.pool.release(poop)
+        self.poops.clear()
+        for column in self.columns:
+            column.clear()
+    
+    def spawn(self, y=None):
+        new_poop = self.pool.acquire()
+        if new_poop is None:
+            return False  # Every pooled poop is already falling
+        if y is not None:
+            new_poop.y = y
+        self.poops.append(new_poop)
+        self.columns[self._column(new_poop.x)][new_poop] = None
+        return True
+    
+    def update(self):
+        poops = self.poops
+        i = 0
+        while i < len(poops):
+            poop = poops[i]
+            poop.move()
+            if poop.is_off_screen():
+                # Remove it by moving the last poop into its slot; that one
+                # hasn't been moved yet, so look at this slot again
+                poops[i] = poops[-1]
+                poops.pop()
+                del self.columns[self._column(poop.x)][poop]
+                self.pool.release(poop)
+            else:
+                i += 1
+    
+    def collides(self, player, margin=COLLISION_MARGIN):
+        return bool(self.collisions((player,), margin))
+    
+    def collisions(self, players, margin=COLLISION_MARGIN):
+        # Players hit by any poop. Broad phase: a poop can only overlap a
+        # player's shrunken hitbox if its x lies in the band below, so only
+        # the columns covering that band get the exact check_collision() test.
+        hits = []
+        for player in players:
+            first = self._column(player.x + 2 * margin - self.poop_width)
+            last = self._column(player.x + player.width - 2 * margin)
+            if self._column_hit(player, margin, first, last):
+                hits.append(player)
+        return hits
+    
+    def _column_hit(self, player, margin, first, last):
+        for column in self.columns[first:last + 1]:
+            for poop in column:
+                if check_collision(player, poop, margin):
+                    return True
+        return False
+    
+    def positions(self, alpha=1.0):
+        # Poops fall at a constant speed, so their previous tick is one step back
+        behind = 1.0 - alpha
+        return [(poop.x, poop.y - poop.speed * behind, poop.rotation - poop.rotation_speed * behind)
+                for poop in self.poops]
+
+def create_poop_container(config, rng=random):
+    if config.poop_store == "array":
+        try:
+            return PoopStore(config.poop_size, config.poop_size, config.poop_speed,
+                             config.screen_width, config.screen_height, rng=rng)
+        except ImportError as e:
+            print(f"Error creating poop store: {e}")
+    return PoopList(config, rng)
+
+# One game from start to game over. step() advances exactly one tick.
+#
+# All randomness comes from a generator seeded per game, so a game can be
+# reproduced exactly from its config, seed and the inputs of every tick.
+# With record=True those inputs are kept in self.inputs, one byte per tick.
+class GameState:
+    def __init__(self, config=None, seed=None, record=False):
+        self.config = config or GameConfig()
+        self.random = random.Random()
+        self.record = record
+        self.profiler = None  # Optional FrameProfiler timing the "player" and "poops" sections
+        self.player = Player(self.config)
+        self.poops = create_poop_container(self.config, self.random)
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.random.seed(seed)
+        self.inputs = bytearray() if self.record else None
+        
+        self.player.reset()
+        self.poops.clear()
+        self.ticks = 0  # Ticks survived so far; this is the score clock
+        self.spawn_counter = 0  # Counter for poop spawning
+        self.game_over = False
+        
+        # Initial poop generation to meet minimum requirement
+        for _ in range(self.config.min_active_poops):
+            self.poops.spawn(y=self.random.randint(-300, -40))  # Stagger initial positions
+    
+    @property
+    def survival_time(self):
+        return self.ticks / self.config.tick_rate
+    
+    def step(self, inputs):
+        # inputs is a bitmask of INPUT_LEFT / INPUT_RIGHT held during this tick
+        if self.game_over:
+            return True
+        self.ticks += 1
+        if self.inputs is not None:
+            self.inputs.append(inputs)
+        
+        profiler = self.profiler
+        if profiler is not None:
+            with profiler.section("player"):
+                self._step_player(inputs)
+            with profiler.section("poops"):
+                self._step_poops()
+        else:
+            self._step_player(inputs)
+            self._step_poops()
+        return self.game_over
+    
+    def _step_player(self, inputs):
+        # Handle player movement
+        player = self.player
+        player.prev_x = player.x
+        if inputs & INPUT_LEFT:
+            player.move("left")
+        if inputs & INPUT_RIGHT:
+            player.move("right")
+        player.animate(inputs)
+    
+    def _step_poops(self):
+        config = self.config
+        
+        # Spawn new poops to maintain the flow
+        self.spawn_counter += 1
+        if self.spawn_counter >= config.poop_spawn_rate and len(self.poops) < config.max_active_poops:
+            self.poops.spawn()
+            self.spawn_counter = 0
+        
+        # Move all poops, drop the ones that fell off screen and check for collision
+        self.poops.update()
+        if self.poops.collides(self.player, config.collision_margin):
+            self.game_over = True
+        
+        # Ensure we maintain the minimum number of poops
+        while len(self.poops) < config.min_active_poops:
+            if not self.poops.spawn():
+                break
@@ -0,0 +1,82 @@
+import time
+
+import pygame
+
+from game_state import INPUT_LEFT, INPUT_RIGHT
+from profiler import Window, percentiles
+
+# Keyboard input for the simulation, one snapshot per tick. Arrow keys are
+# tracked from KEYDOWN/KEYUP events rather than polled, and a press is
+# latched until the next tick takes it, so a tap that starts and ends
+# between two ticks still moves the player for one tick.
+#
+# With late_latch, every snapshot first pulls key events that arrived since
+# the frame's event loop ran, right before the tick that uses them.
+#
+# It also measures input-to-present latency: the time from when the game
+# sees a key change until the first frame drawn from a tick that used it is
+# on screen. pygame events carry no timestamp, so time spent in the OS and
+# SDL queues before the game sees the event is not included.
+
+KEY_BITS = {pygame.K_LEFT: INPUT_LEFT, pygame.K_RIGHT: INPUT_RIGHT}
+
+class InputLatch:
+    def __init__(self, late_latch=False, window=240):
+        self.late_latch = late_latch
+        self.held = 0  # Bitmask of arrow keys down right now
+        self._tapped = 0  # Keys pressed since the last snapshot, even if released again
+        self._changed_at = None  # When the oldest change not yet in a snapshot was seen
+        self._awaiting_present = []  # Change times used by ticks that aren't on screen yet
+        self._latencies = Window(window)  # Seconds
+    
+    def handle_event(self, event):
+        # Returns True if the event was an arrow key and is taken care of
+        bit = KEY_BITS.get(getattr(event, "key", None))
+        if bit is None:
+            return False
+        if event.type == pygame.KEYDOWN:
+            self.held |= bit
+            self._tapped |= bit
+        elif event.type == pygame.KEYUP:
+            self.held &= ~bit
+        else:
+            return False
+        if self._changed_at is None:
+            self._changed_at = time.perf_counter()
+        return True
+    
+    def _pump(self):
+        # Other keys go back on the queue for the next frame's event loop
+        for event in pygame.event.get((pygame.KEYDOWN, pygame.KEYUP)):
+            if not self.handle_event(event):
+                pygame.event.post(event)
+    
+    def snapshot(self):
+        # Inputs for one tick: keys held now plus any tapped since the last tick
+        if self.late_latch:
+            self._pump()
+        inputs = self.held | self._tapped
+        self._tapped = 0
+        if self._changed_at is not None:
+            self._awaiting_present.append(self._changed_at)
+            self._changed_at = None
+        return inputs
+    
+    def presented(self):
+        # Call right after a game frame is on screen
+        if not self._awaiting_present:
+            return
+        now = time.perf_counter()
+        for changed_at in self._awaiting_present:
+            self._latencies.append(now - changed_at)
+        self._awaiting_present.clear()
+    
+    def latency_percentiles(self, points=(50, 95, 99)):
+        # Input-to-present latency over the last `window` key changes, in seconds
+        return percentiles(self._latencies.values(), points)
+    
+    def reset(self):
+        # New game: forget taps and changes from the menus, keep what's held
+        self._tapped = 0
+        self._changed_at = None
+        self._awaiting_present.clear()
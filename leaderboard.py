@@ -0,0 +1,326 @@
+import array
+import bisect
+import heapq
+import os
+import queue
+import threading
+import time
+
+# In-memory view of the ranking file so the high score screen never has to
+# re-read and re-sort it every frame. Only a bounded top-N heap is kept for
+# display, plus a sorted array of all scores so rank lookups are O(log n).
+#
+# The file itself is an append-only log of "name,score" lines: every game
+# appends (and fsyncs) a single record, and compact() periodically rewrites
+# it as a sorted snapshot through a temp file + rename, so a crash can never
+# leave a half-written leaderboard behind.
+class Leaderboard:
+    def __init__(self, path, size=5, check_interval=1.0, compact_every=100):
+        self.path = path
+        self.size = size  # Number of entries shown on the high score screen
+        self.check_interval = check_interval  # Seconds between file change checks
+        self.compact_every = compact_every  # Appended records before a background compaction
+        self._top = []  # Min-heap of (score, -order, name) for the best `size` entries
+        self._top_sorted = None  # top() result, rebuilt only after the heap changes
+        self._index = array.array("d")  # Every score in ascending order, for rank lookups
+        self._order = 0  # Insertion counter used to break ties in the heap
+        self._signature = None  # (mtime, size) of the file when we last loaded it
+        self._last_check = 0
+        self._pending = 0  # Records in the file that are not part of the sorted snapshot
+        self._lock = threading.RLock()
+        self._compactor = None
+        self.reload()
+    
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _read_records(self):
+        # Returns the (name, score) records in file order and how many lines
+        # are not part of the sorted snapshot (appended, torn or malformed)
+        records = []
+        pending = 0
+        in_order = True
+        if not os.path.exists(self.path):
+            return records, pending
+        try:
+            with open(self.path, "r") as file:
+                for line in file:
+                    # A line without its newline is a torn append from a crash
+                    if not line.endswith("\n"):
+                        pending += 1
+                        continue
+                    parts = line.strip().split(",")
+                    if len(parts) != 2:
+                        pending += 1
+                        continue
+                    name, score = parts
+                    try:
+                        score = float(score)
+                    except ValueError:
+                        pending += 1
+                        continue
+                    # Everything after the first out-of-order record was appended
+                    if records and score > records[-1][1]:
+                        in_order = False
+                    if not in_order:
+                        pending += 1
+                    records.append((name, score))
+        except Exception as e:
+            print(f"Error reading scores: {e}")
+        return records, pending
+    
+    def reload(self):
+        with self._lock:
+            records, pending = self._read_records()
+            self._rebuild(records)
+            self._pending = pending
+            self._signature = self._stat_signature()
+            self._last_check = time.monotonic()
+    
+    def _build(self, records):
+        # (index, top heap) for records, made without touching self so it
+        # can be done before taking the lock
+        index = array.array("d", sorted(score for _, score in records))
+        top = heapq.nlargest(self.size, ((score, -order, name) for order, (name, score) in enumerate(records)))
+        heapq.heapify(top)
+        return index, top
+    
+    def _rebuild(self, records, built=None):
+        # built is _build(records), if it was already done
+        self._index, self._top = built or self._build(records)
+        self._top_sorted = None
+        self._order = len(records)
+    
+    def _push_top(self, name, score, order):
+        # Earlier scores win ties, so the newest of equal scores drops out first
+        entry = (score, -order, name)
+        if len(self._top) < self.size:
+            heapq.heappush(self._top, entry)
+        elif entry > self._top[0]:
+            heapq.heapreplace(self._top, entry)
+        else:
+            return
+        self._top_sorted = None
+    
+    def refresh(self):
+        # Only touch the disk every check_interval seconds, and only reload
+        # when somebody else changed the file since we last saw it
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        # Don't wait on a compaction running in the background, just check later
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_check = now
+            if self._stat_signature() == self._signature:
+                return False
+            self.reload()
+            return True
+        finally:
+            self._lock.release()
+    
+    def top(self, count=None):
+        # At most self.size entries are kept, highest first
+        self.refresh()
+        top = self._top_sorted
+        if top is None:
+            # Built under the lock, so a score added or a compaction finishing
+            # on another thread can't leave a stale or partial list cached
+            with self._lock:
+                if self._top_sorted is None:
+                    self._top_sorted = [(name, score) for score, _, name in sorted(self._top, reverse=True)]
+                top = self._top_sorted
+        if count is None:
+            return top
+        return top[:count]
+    
+    def rank(self, score):
+        # 1-based place a score has among all recorded scores (ties share a place)
+        self.refresh()
+        return len(self._index) - bisect.bisect_right(self._index, score) + 1
+    
+    def count(self):
+        return len(self._index)
+    
+    def placement(self, score):
+        # (rank, total) a new score would get, answered from memory
+        return self.rank(score), self.count() + 1
+    
+    def get_scores(self):
+        # Full ranking, read straight from the file since only the top
+        # entries are kept in memory
+        with self._lock:
+            records, _ = self._read_records()
+        records.sort(key=lambda x: x[1], reverse=True)
+        return records
+    
+    def add(self, name, score):
+        return self.add_many([(name, score)])[0]
+    
+    def add_many(self, records):
+        # Saves several (name, score) records with a single append and fsync;
+        # returns the rank each one got. Raises if they didn't reach the
+        # file, without adding them to memory either.
+        self.refresh()
+        
+        with self._lock:
+            self._append(records)
+            self._pending += len(records)
+            
+            # The cached top list is only dropped once the slow append is
+            # done, so top() on the main thread doesn't wait for the fsync
+            for name, score in records:
+                bisect.insort(self._index, score)
+                self._push_top(name, score, self._order)
+                self._order += 1
+            
+            ranks = [len(self._index) - bisect.bisect_right(self._index, score) + 1 for _, score in records]
+        
+        if self.compact_every and self._pending >= self.compact_every:
+            self.compact_in_background()
+        return ranks
+    
+    def _append(self, records):
+        expected_size = self._signature[1] if self._signature else 0
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size_before = os.fstat(fd).st_size
+            # Drop a record that was cut short by a crash before adding ours,
+            # however long it is: back to the last newline, or the start
+            if size_before and os.pread(fd, 1, size_before - 1) != b"\n":
+                end = size_before
+                while end:
+                    start = max(0, end - 4096)
+                    newline = os.pread(fd, end - start, start).rfind(b"\n")
+                    if newline >= 0:
+                        end = start + newline + 1
+                        break
+                    end = start
+                os.ftruncate(fd, end)
+            os.write(fd, "".join(f"{name},{score}\n" for name, score in records).encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        
+        # Our own write shouldn't trigger a reload, but one from another
+        # process in between should
+        if size_before == expected_size:
+            self._signature = self._stat_signature()
+    
+    def needs_compaction(self):
+        return self._pending > 0
+    
+    def compact(self):
+        # The snapshot is read, sorted and written without holding the lock,
+        # so top() and add() only wait for the final rename
+        tmp_path = self.path + ".compact"
+        for _ in range(3):
+            # Re-read so records appended by other processes are kept
+            signature = self._stat_signature()
+            records, _ = self._read_records()
+            records.sort(key=lambda x: x[1], reverse=True)
+            built = self._build(records)
+            try:
+                with open(tmp_path, "w") as file:
+                    for name, score in records:
+                        file.write(f"{name},{score}\n")
+                    file.flush()
+                    os.fsync(file.fileno())
+                
+                with self._lock:
+                    # Somebody appended while we were reading or writing, start over
+                    if self._stat_signature() != signature:
+                        continue
+                    
+                    os.replace(tmp_path, self.path)
+                    self._rebuild(records, built)
+                    self._pending = 0
+                    self._signature = self._stat_signature()
+                    self._last_check = time.monotonic()
+                self._fsync_directory()
+            except Exception as e:
+                print(f"Error compacting scores: {e}")
+                return False
+            return True
+        return False
+    
+    def compact_in_background(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+    
+    def _fsync_directory(self):
+        # Make the rename itself durable (not supported everywhere)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+# Where a submitted score landed, as (rank, total) in value. None until it
+# is known; the writer fills it in once the score is saved.
+class Placement:
+    def __init__(self, value=None):
+        self.value = value
+
+# Saves scores (and anything else slow, like replays) one at a time on a
+# background thread, so a slow or networked disk never stalls a frame.
+# close() writes out everything still queued before returning.
+class ScoreWriter:
+    def __init__(self, leaderboard):
+        self.leaderboard = leaderboard
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, name, score):
+        # Queues the score and returns its Placement, filled in right away
+        # if the leaderboard can tell without waiting (a remote one can't)
+        placement = Placement(self.leaderboard.placement(score))
+        self._queue.put((self._save, (name, score, placement)))
+        return placement
+    
+    def _save(self, name, score, placement):
+        try:
+            rank = self.leaderboard.add(name, score)
+        except Exception as e:
+            print(f"Error saving score: {e}")
+            return
+        if rank is not None:
+            placement.value = (rank, self.leaderboard.count())
+    
+    def call(self, function, *args):
+        self._queue.put((function, args))
+    
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                function, args = job
+                function(*args)
+            except Exception as e:
+                print(f"Error in score writer: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def flush(self):
+        # Waits until everything queued so far is written
+        self._queue.join()
+    
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
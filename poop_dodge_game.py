@@ -1,747 +1,593 @@
 import pygame
 import sys
-import random
 import time
 import os
+import json
+import math
 
-# Initialize pygame
-pygame.init()
+from binary_ranking import BinaryLeaderboard, text_to_binary
+from game_state import GameConfig, GameState, SCREEN_WIDTH, SCREEN_HEIGHT, POOP_SIZE, TICK_RATE
+from input_latch import InputLatch
+from leaderboard import Leaderboard, ScoreWriter
+from profiler import FrameProfiler
+from render_backend import create_backend
+from replay import Replay, save_replay
+from score_client import RemoteLeaderboard
+from screen_cache import ScreenCache
+from soak import Autopilot, SoakMonitor
+from text_cache import TextCache
 
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-PLAYER_SIZE = 50
-POOP_SIZE = 40
-PLAYER_SPEED = 8
-POOP_SPEED = 10  # 2x faster than original (was 5)
-POOP_SPAWN_RATE = 20  # New poop every 20 frames (about 1/3 second)
-MIN_ACTIVE_POOPS = 5  # Minimum number of active poops
-MAX_ACTIVE_POOPS = 10  # Maximum number of active poops at once
+# Constants (gameplay ones live in game_state)
+TICK_DURATION = 1.0 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5  # Ticks simulated before a frame has to be drawn
+IDLE_WAKEUP_MS = 500  # Menus wait for events, but look for leaderboard changes this often
 WHITE = (255, 255, 255)
 BLUE = (0, 0, 255)
 BROWN = (139, 69, 19)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 RANKING_FILE = "ranking.txt"
+BINARY_RANKING_FILE = "ranking.bin"
+RANKING_FORMAT = os.environ.get("POOP_RANKING_FORMAT", "text")  # "binary" uses BINARY_RANKING_FILE
+SCORE_SERVER = os.environ.get("POOP_SCORE_SERVER")  # "host:port" of a shared score_server.py
+FONT_CACHE_FILE = "font_cache.json"  # System font paths resolved on earlier runs
+DIRTY_RECTS = os.environ.get("POOP_DIRTY_RECTS") == "1"  # Only redraw what moved during play
+RENDERER = os.environ.get("POOP_RENDERER", "software")  # "gpu" or "sdl-software", see render_backend
+WINDOW_SIZE = os.environ.get("POOP_WINDOW_SIZE")  # e.g. "1920x1080" to scale the game up, or "fullscreen"
+POOP_STORE = os.environ.get("POOP_STORE", "list")  # "array" keeps poops in numpy arrays
+# What to do when drawing can't keep up and MAX_TICKS_PER_FRAME is hit:
+# "drop" throws the backlog away (the game slows down), "catchup" keeps it
+# for the next frames (the game keeps real-time speed but skips frames)
+FRAME_SKIP_POLICY = os.environ.get("POOP_FRAME_SKIP", "drop")
+LATE_LATCH = os.environ.get("POOP_LATE_LATCH") == "1"  # Read arrow keys again right before every tick
+PROFILE = os.environ.get("POOP_PROFILE") == "1"  # Frame-time overlay on from the start; F3 toggles it
+PROFILE_CSV = os.environ.get("POOP_PROFILE_CSV")  # Also write every profiled frame to this CSV file
+AUTOPILOT = os.environ.get("POOP_AUTOPILOT") == "1"  # Play by itself forever and watch for leaks, see soak.py
+SOAK_INTERVAL = float(os.environ.get("POOP_SOAK_INTERVAL", "60"))  # Seconds between autopilot samples
+SOAK_CSV = os.environ.get("POOP_SOAK_CSV")  # Also write every autopilot sample to this CSV file
 
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Poop Dodge Game")
-clock = pygame.time.Clock()
-
-# Font setup
-font = pygame.font.SysFont(None, 36)
-large_font = pygame.font.SysFont(None, 72)
+# Display, clock and fonts are created by init_display() on first use, so
+# importing this module (from tools, replays or benchmarks) starts nothing.
+# Game frames go through display (a render backend); screen is the surface
+# menus are composed on, at the game's own resolution.
+display = None
+screen = None
+clock = None
+font = None
+large_font = None
+small_font = None  # Only loaded once the profiler overlay is shown
 
-# Import math module for animation
-import math
+# Rendered strings are reused instead of rasterized every frame
+text_cache = TextCache()
 
-# We'll create custom poop and player images instead of downloading them
-poop_image = None
-player_image = None
+# Menus are composed once per distinct content and copied back after that
+screen_cache = ScreenCache()
 
-class Player:
-    def __init__(self):
-        self.width = PLAYER_SIZE
-        self.height = PLAYER_SIZE
-        self.x = SCREEN_WIDTH // 2 - self.width // 2
-        self.y = SCREEN_HEIGHT - self.height - 10
-        self.speed = PLAYER_SPEED
-        self.color = BLUE
-        self.animation_frame = 0
-        self.animation_speed = 0.2
-        self.direction = 0  # 0 = stationary, -1 = left, 1 = right
-    
-    def draw(self):
-        # Create a running animation effect
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            self.direction = -1
-            self.animation_frame += self.animation_speed
-        elif keys[pygame.K_RIGHT]:
-            self.direction = 1
-            self.animation_frame += self.animation_speed
-        else:
-            self.direction = 0
-            self.animation_frame = 0
-        
-        # Calculate animation offsets
-        leg_offset = 5 * math.sin(self.animation_frame * 2) if self.direction != 0 else 0
-        arm_offset = 5 * math.sin(self.animation_frame * 2 + math.pi) if self.direction != 0 else 0
-        
-        # Colors
-        skin_color = (255, 218, 185)
-        shirt_color = self.color
-        pants_color = (0, 0, 128)  # Dark blue
-        
-        # Head
-        head_size = self.width // 2.5
-        head_x = self.x + self.width // 2
-        head_y = self.y + head_size // 2
-        pygame.draw.circle(screen, skin_color, (head_x, head_y), head_size // 2)
-        
-        # Eyes
-        eye_size = head_size // 8
-        pygame.draw.circle(screen, WHITE, (head_x - head_size // 4, head_y - head_size // 8), eye_size)
-        pygame.draw.circle(screen, WHITE, (head_x + head_size // 4, head_y - head_size // 8), eye_size)
-        pygame.draw.circle(screen, BLACK, (head_x - head_size // 4, head_y - head_size // 8), eye_size // 2)
-        pygame.draw.circle(screen, BLACK, (head_x + head_size // 4, head_y - head_size // 8), eye_size // 2)
-        
-        # Smile
-        smile_rect = pygame.Rect(head_x - head_size // 4, head_y, head_size // 2, head_size // 4)
-        pygame.draw.arc(screen, BLACK, smile_rect, 0, math.pi, 2)
-        
-        # Torso (trapezoid shape)
-        torso_width_top = self.width // 1.5
-        torso_width_bottom = self.width // 2
-        torso_height = self.height // 2.5
-        torso_x = self.x + (self.width - torso_width_top) // 2
-        torso_y = head_y + head_size // 2
-        
-        torso_points = [
-            (torso_x, torso_y),
-            (torso_x + torso_width_top, torso_y),
-            (torso_x + torso_width_top + (torso_width_bottom - torso_width_top) // 2, torso_y + torso_height),
-            (torso_x - (torso_width_bottom - torso_width_top) // 2, torso_y + torso_height)
-        ]
-        pygame.draw.polygon(screen, shirt_color, torso_points)
-        
-        # Legs
-        leg_width = torso_width_bottom // 3
-        leg_height = self.height // 2.5
-        left_leg_x = torso_x + (torso_width_bottom - leg_width * 2) // 3
-        right_leg_x = torso_x + torso_width_bottom - leg_width - (torso_width_bottom - leg_width * 2) // 3
-        leg_y = torso_y + torso_height
-        
-        # Left leg with animation
-        left_leg_points = [
-            (left_leg_x, leg_y),
-            (left_leg_x + leg_width, leg_y),
-            (left_leg_x + leg_width - int(leg_offset), leg_y + leg_height),
-            (left_leg_x - int(leg_offset), leg_y + leg_height)
-        ]
-        pygame.draw.polygon(screen, pants_color, left_leg_points)
-        
-        # Right leg with animation
-        right_leg_points = [
-            (right_leg_x, leg_y),
-            (right_leg_x + leg_width, leg_y),
-            (right_leg_x + leg_width + int(leg_offset), leg_y + leg_height),
-            (right_leg_x + int(leg_offset), leg_y + leg_height)
-        ]
-        pygame.draw.polygon(screen, pants_color, right_leg_points)
-        
-        # Feet
-        foot_width = int(leg_width * 1.2)
-        foot_height = leg_height // 4
-        pygame.draw.ellipse(screen, BLACK, 
-                           (left_leg_x - int(leg_offset) - foot_width // 4, leg_y + leg_height - foot_height // 2, 
-                            foot_width, foot_height))
-        pygame.draw.ellipse(screen, BLACK, 
-                           (right_leg_x + int(leg_offset) - foot_width // 4, leg_y + leg_height - foot_height // 2, 
-                            foot_width, foot_height))
-        
-        # Arms - using polygons instead of lines to avoid float issues
-        arm_width = torso_width_top // 6
-        arm_length = int(torso_height * 0.8)
-        
-        # Left arm with animation
-        left_arm_x = torso_x
-        left_arm_y = torso_y + torso_height // 4
-        left_hand_x = left_arm_x - arm_width - int(arm_offset)
-        left_hand_y = left_arm_y + arm_length
-        
-        # Draw arm as a polygon
-        left_arm_points = [
-            (left_arm_x, left_arm_y - arm_width//2),
-            (left_arm_x, left_arm_y + arm_width//2),
-            (left_hand_x, left_hand_y + arm_width//2),
-            (left_hand_x, left_hand_y - arm_width//2)
-        ]
-        pygame.draw.polygon(screen, skin_color, left_arm_points)
-        pygame.draw.circle(screen, skin_color, (left_hand_x, left_hand_y), arm_width // 2)
-        
-        # Right arm with animation
-        right_arm_x = torso_x + torso_width_top
-        right_arm_y = torso_y + torso_height // 4
-        right_hand_x = right_arm_x + arm_width + int(arm_offset)
-        right_hand_y = right_arm_y + arm_length
-        
-        # Draw arm as a polygon
-        right_arm_points = [
-            (right_arm_x, right_arm_y - arm_width//2),
-            (right_arm_x, right_arm_y + arm_width//2),
-            (right_hand_x, right_hand_y + arm_width//2),
-            (right_hand_x, right_hand_y - arm_width//2)
-        ]
-        pygame.draw.polygon(screen, skin_color, right_arm_points)
-        pygame.draw.circle(screen, skin_color, (right_hand_x, right_hand_y), arm_width // 2)
-    
-    def move(self, direction):
-        if direction == "left" and self.x > 0:
-            self.x -= self.speed
-        if direction == "right" and self.x < SCREEN_WIDTH - self.width:
-            self.x += self.speed
-    
-    def reset(self):
-        self.x = SCREEN_WIDTH // 2 - self.width // 2
-        self.animation_frame = 0
-        self.direction = 0
+# Scores are loaded on first use and then kept in memory between frames
+leaderboard = None
 
-class Poop:
-    def __init__(self):
-        self.width = POOP_SIZE
-        self.height = POOP_SIZE
-        self.reset()
-        self.speed = POOP_SPEED
-        self.color = BROWN
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-3, 3)  # Random rotation speed
-    
-    def draw(self):
-        # Draw a more detailed poop emoji
-        # Main body
-        pygame.draw.circle(screen, self.color, (self.x + self.width // 2, self.y + self.height // 2), self.width // 2)
-        
-        # Top part
-        pygame.draw.circle(screen, self.color, (self.x + self.width // 2, self.y + self.height // 4), self.width // 3)
-        
-        # Eyes (white part)
-        eye_size = self.width // 8
-        pygame.draw.circle(screen, WHITE, (self.x + self.width // 3, self.y + self.height // 3), eye_size)
-        pygame.draw.circle(screen, WHITE, (self.x + 2 * self.width // 3, self.y + self.height // 3), eye_size)
-        
-        # Pupils (black part)
-        pupil_size = eye_size // 2
-        pygame.draw.circle(screen, BLACK, (self.x + self.width // 3, self.y + self.height // 3), pupil_size)
-        pygame.draw.circle(screen, BLACK, (self.x + 2 * self.width // 3, self.y + self.height // 3), pupil_size)
-        
-        # Smile
-        smile_rect = pygame.Rect(self.x + self.width // 4, self.y + self.height // 2, self.width // 2, self.height // 4)
-        pygame.draw.arc(screen, BLACK, smile_rect, 0, math.pi, 2)
-    
-    def move(self):
-        self.y += self.speed
-        self.rotation += self.rotation_speed
-    
-    def reset(self):
-        self.x = random.randint(0, SCREEN_WIDTH - self.width)
-        self.y = -self.height
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-3, 3)  # New random rotation speed
-    
-    def is_off_screen(self):
-        return self.y > SCREEN_HEIGHT
+# Where each frame's time goes, shown as an overlay while enabled
+profiler = FrameProfiler(csv_path=PROFILE_CSV, enabled=PROFILE)
 
-def check_collision(player, poop):
-    # Use a slightly smaller collision box for better gameplay feel
-    collision_margin = 10
-    if (player.x + collision_margin < poop.x + poop.width - collision_margin and
-        player.x + player.width - collision_margin > poop.x + collision_margin and
-        player.y + collision_margin < poop.y + poop.height - collision_margin and
-        player.y + player.height - collision_margin > poop.y + collision_margin):
-        return True
-    return False
+def init_display():
+    # Starts only the display and font subsystems; pygame.init() would also
+    # bring up audio, joysticks and everything else the game never uses
+    global display, screen, clock, font, large_font
+    if screen is None:
+        pygame.display.init()
+        pygame.font.init()
+        fullscreen = WINDOW_SIZE == "fullscreen"
+        window_size = None
+        if WINDOW_SIZE and not fullscreen:
+            width, _, height = WINDOW_SIZE.partition("x")
+            window_size = (int(width), int(height))
+        options = dict(window_size=window_size, background=BLACK, title="Poop Dodge Game",
+                       dirty_rects=DIRTY_RECTS, fullscreen=fullscreen)
+        try:
+            display = create_backend(RENDERER, (SCREEN_WIDTH, SCREEN_HEIGHT), **options)
+        except Exception as e:
+            print(f"Error starting {RENDERER} renderer, using software: {e}")
+            display = create_backend("software", (SCREEN_WIDTH, SCREEN_HEIGHT), **options)
+        screen = display.surface
+        clock = pygame.time.Clock()
+        
+        # pygame's bundled font, which is what SysFont(None) ends up using
+        # anyway, but without scanning every system font directory first
+        font = pygame.font.Font(None, 36)
+        large_font = pygame.font.Font(None, 72)
+    return screen
 
-def get_high_scores():
-    if not os.path.exists(RANKING_FILE):
-        return []
-    
-    scores = []
+def load_font(name, size):
+    # A system font by name. Finding it means scanning the system font
+    # directories, so the path found is remembered in FONT_CACHE_FILE.
+    cache = {}
     try:
-        with open(RANKING_FILE, "r") as file:
-            for line in file:
-                parts = line.strip().split(",")
-                if len(parts) == 2:
-                    name, score = parts
-                    scores.append((name, float(score)))
-    except Exception as e:
-        print(f"Error reading scores: {e}")
-    
-    # Sort by score (highest first)
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return scores
+        with open(FONT_CACHE_FILE, "r") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        pass
+    
+    path = cache.get(name)
+    if path is None or (path and not os.path.exists(path)):
+        path = pygame.font.match_font(name) or ""  # "" = not installed, use the default font
+        cache[name] = path
+        try:
+            with open(FONT_CACHE_FILE, "w") as file:
+                json.dump(cache, file)
+        except Exception as e:
+            print(f"Error saving font cache: {e}")
+    return pygame.font.Font(path or None, size)
 
-def save_score(name, score):
-    scores = get_high_scores()
-    scores.append((name, score))
-    scores.sort(key=lambda x: x[1], reverse=True)
-    
-    try:
-        with open(RANKING_FILE, "w") as file:
-            for name, score in scores:
-                file.write(f"{name},{score}\n")
-    except Exception as e:
-        print(f"Error saving score: {e}")
+def get_leaderboard():
+    global leaderboard
+    if leaderboard is None:
+        if RANKING_FORMAT == "binary":
+            # The first binary run starts from the existing text ranking
+            if not os.path.exists(BINARY_RANKING_FILE) and os.path.exists(RANKING_FILE):
+                try:
+                    text_to_binary(RANKING_FILE, BINARY_RANKING_FILE)
+                except Exception as e:
+                    print(f"Error converting scores: {e}")
+            leaderboard = BinaryLeaderboard(BINARY_RANKING_FILE)
+        else:
+            leaderboard = Leaderboard(RANKING_FILE)
+        
+        # With a score server the local file is only the fallback
+        if SCORE_SERVER:
+            host, _, port = SCORE_SERVER.partition(":")
+            leaderboard = RemoteLeaderboard(host, int(port or 5050), local=leaderboard)
+    return leaderboard
 
-def display_high_scores():
-    scores = get_high_scores()
-    y_pos = 200
-    
-    title_text = large_font.render("HIGH SCORES", True, WHITE)
-    screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 120))
-    
-    for i, (name, score) in enumerate(scores[:5]):  # Show top 5 scores
-        score_text = font.render(f"{i+1}. {name}: {score:.1f}s", True, WHITE)
-        screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, y_pos))
-        y_pos += 40
+# Entities are drawn once into these surfaces and blitted afterwards,
+# keyed by everything that changes how they look
+sprite_cache = {}
+SPRITE_PADDING = 10  # Room for the arms, feet and poop top that reach outside the hitbox
+PLAYER_ANIMATION_FRAMES = 16  # Poses in one running cycle
+POOP_ROTATION_STEPS = 64  # Pre-rotated poop sprites, one every 5.625 degrees
+POOP_ROTATION = True  # Spin poops as they fall
 
-def get_nickname():
-    nickname = ""
-    input_active = True
-    
-    while input_active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN and nickname:
-                    input_active = False
-                elif event.key == pygame.K_BACKSPACE:
-                    nickname = nickname[:-1]
-                elif event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-                elif len(nickname) < 10:  # Limit nickname length
-                    if event.unicode.isalnum() or event.unicode == "_":
-                        nickname += event.unicode
-        
-        # Clear screen
-        screen.fill(BLACK)
-        
-        # Display prompt
-        prompt_text = font.render("Enter your nickname:", True, WHITE)
-        screen.blit(prompt_text, (SCREEN_WIDTH // 2 - prompt_text.get_width() // 2, 200))
-        
-        # Display current input
-        input_text = font.render(nickname + "_", True, WHITE)
-        screen.blit(input_text, (SCREEN_WIDTH // 2 - input_text.get_width() // 2, 250))
-        
-        # Display instructions
-        instr_text = font.render("Press ENTER when done", True, WHITE)
-        screen.blit(instr_text, (SCREEN_WIDTH // 2 - instr_text.get_width() // 2, 300))
-        
-        pygame.display.flip()
-        clock.tick(30)
-    
-    return nickname
+def draw_player_shape(surface, x, y, width, height, color, leg_offset, arm_offset):
+    # Colors
+    skin_color = (255, 218, 185)
+    shirt_color = color
+    pants_color = (0, 0, 128)  # Dark blue
+    
+    # Head
+    head_size = width // 2.5
+    head_x = x + width // 2
+    head_y = y + head_size // 2
+    pygame.draw.circle(surface, skin_color, (head_x, head_y), head_size // 2)
+    
+    # Eyes
+    eye_size = head_size // 8
+    pygame.draw.circle(surface, WHITE, (head_x - head_size // 4, head_y - head_size // 8), eye_size)
+    pygame.draw.circle(surface, WHITE, (head_x + head_size // 4, head_y - head_size // 8), eye_size)
+    pygame.draw.circle(surface, BLACK, (head_x - head_size // 4, head_y - head_size // 8), eye_size // 2)
+    pygame.draw.circle(surface, BLACK, (head_x + head_size // 4, head_y - head_size // 8), eye_size // 2)
+    
+    # Smile
+    smile_rect = pygame.Rect(head_x - head_size // 4, head_y, head_size // 2, head_size // 4)
+    pygame.draw.arc(surface, BLACK, smile_rect, 0, math.pi, 2)
+    
+    # Torso (trapezoid shape)
+    torso_width_top = width // 1.5
+    torso_width_bottom = width // 2
+    torso_height = height // 2.5
+    torso_x = x + (width - torso_width_top) // 2
+    torso_y = head_y + head_size // 2
+    
+    torso_points = [
+        (torso_x, torso_y),
+        (torso_x + torso_width_top, torso_y),
+        (torso_x + torso_width_top + (torso_width_bottom - torso_width_top) // 2, torso_y + torso_height),
+        (torso_x - (torso_width_bottom - torso_width_top) // 2, torso_y + torso_height)
+    ]
+    pygame.draw.polygon(surface, shirt_color, torso_points)
+    
+    # Legs
+    leg_width = torso_width_bottom // 3
+    leg_height = height // 2.5
+    left_leg_x = torso_x + (torso_width_bottom - leg_width * 2) // 3
+    right_leg_x = torso_x + torso_width_bottom - leg_width - (torso_width_bottom - leg_width * 2) // 3
+    leg_y = torso_y + torso_height
+    
+    # Left leg with animation
+    left_leg_points = [
+        (left_leg_x, leg_y),
+        (left_leg_x + leg_width, leg_y),
+        (left_leg_x + leg_width - int(leg_offset), leg_y + leg_height),
+        (left_leg_x - int(leg_offset), leg_y + leg_height)
+    ]
+    pygame.draw.polygon(surface, pants_color, left_leg_points)
+    
+    # Right leg with animation
+    right_leg_points = [
+        (right_leg_x, leg_y),
+        (right_leg_x + leg_width, leg_y),
+        (right_leg_x + leg_width + int(leg_offset), leg_y + leg_height),
+        (right_leg_x + int(leg_offset), leg_y + leg_height)
+    ]
+    pygame.draw.polygon(surface, pants_color, right_leg_points)
+    
+    # Feet
+    foot_width = int(leg_width * 1.2)
+    foot_height = leg_height // 4
+    pygame.draw.ellipse(surface, BLACK, 
+                       (left_leg_x - int(leg_offset) - foot_width // 4, leg_y + leg_height - foot_height // 2, 
+                        foot_width, foot_height))
+    pygame.draw.ellipse(surface, BLACK, 
+                       (right_leg_x + int(leg_offset) - foot_width // 4, leg_y + leg_height - foot_height // 2, 
+                        foot_width, foot_height))
+    
+    # Arms - using polygons instead of lines to avoid float issues
+    arm_width = torso_width_top // 6
+    arm_length = int(torso_height * 0.8)
+    
+    # Left arm with animation
+    left_arm_x = torso_x
+    left_arm_y = torso_y + torso_height // 4
+    left_hand_x = left_arm_x - arm_width - int(arm_offset)
+    left_hand_y = left_arm_y + arm_length
+    
+    # Draw arm as a polygon
+    left_arm_points = [
+        (left_arm_x, left_arm_y - arm_width//2),
+        (left_arm_x, left_arm_y + arm_width//2),
+        (left_hand_x, left_hand_y + arm_width//2),
+        (left_hand_x, left_hand_y - arm_width//2)
+    ]
+    pygame.draw.polygon(surface, skin_color, left_arm_points)
+    pygame.draw.circle(surface, skin_color, (left_hand_x, left_hand_y), arm_width // 2)
+    
+    # Right arm with animation
+    right_arm_x = torso_x + torso_width_top
+    right_arm_y = torso_y + torso_height // 4
+    right_hand_x = right_arm_x + arm_width + int(arm_offset)
+    right_hand_y = right_arm_y + arm_length
+    
+    # Draw arm as a polygon
+    right_arm_points = [
+        (right_arm_x, right_arm_y - arm_width//2),
+        (right_arm_x, right_arm_y + arm_width//2),
+        (right_hand_x, right_hand_y + arm_width//2),
+        (right_hand_x, right_hand_y - arm_width//2)
+    ]
+    pygame.draw.polygon(surface, skin_color, right_arm_points)
+    pygame.draw.circle(surface, skin_color, (right_hand_x, right_hand_y), arm_width // 2)
 
-def main():
-    player = Player()
-    active_poops = []  # List to store active poops
-    
-    game_over = False
-    show_high_scores = False
-    start_time = time.time()
-    survival_time = 0
-    spawn_counter = 0  # Counter for poop spawning
-    
-    # Initial poop generation to meet minimum requirement
-    for _ in range(MIN_ACTIVE_POOPS):
-        new_poop = Poop()
-        new_poop.y = random.randint(-300, -40)  # Stagger initial positions
-        active_poops.append(new_poop)
-    
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-                elif event.key == pygame.K_r and (game_over or show_high_scores):
-                    # Reset the game
-                    player.reset()
-                    active_poops.clear()
-                    # Initial poop generation to meet minimum requirement
-                    for _ in range(MIN_ACTIVE_POOPS):
-                        new_poop = Poop()
-                        new_poop.y = random.randint(-300, -40)  # Stagger initial positions
-                        active_poops.append(new_poop)
-                    game_over = False
-                    show_high_scores = False
-                    start_time = time.time()
-                    spawn_counter = 0
-        
-        if not game_over and not show_high_scores:
-            # Handle player movement
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
-                player.move("left")
-            if keys[pygame.K_RIGHT]:
-                player.move("right")
-            
-            # Spawn new poops to maintain the flow
-            spawn_counter += 1
-            if spawn_counter >= POOP_SPAWN_RATE and len(active_poops) < MAX_ACTIVE_POOPS:
-                new_poop = Poop()
-                active_poops.append(new_poop)
-                spawn_counter = 0
-            
-            # Move and check all poops
-            poops_to_remove = []
-            for poop in active_poops:
-                poop.move()
-                
-                # Check if poop is off screen
-                if poop.is_off_screen():
-                    poops_to_remove.append(poop)
-                
-                # Check for collision
-                if check_collision(player, poop):
-                    game_over = True
-                    survival_time = time.time() - start_time
-                    break
-            
-            # Remove poops that went off screen
-            for poop in poops_to_remove:
-                active_poops.remove(poop)
-            
-            # Ensure we maintain the minimum number of poops
-            while len(active_poops) < MIN_ACTIVE_POOPS:
-                new_poop = Poop()
-                active_poops.append(new_poop)
-            
-            # Update timer
-            current_time = time.time() - start_time
-            
-            # Draw everything
-            screen.fill(BLACK)
-            player.draw()
-            for poop in active_poops:
-                poop.draw()
-            
-            # Display timer and active poop count
-            timer_text = font.render(f"Time: {current_time:.1f}s", True, WHITE)
-            screen.blit(timer_text, (10, 10))
-            poop_text = font.render(f"Active Poops: {len(active_poops)}", True, WHITE)
-            screen.blit(poop_text, (10, 50))
-        
-        elif game_over and not show_high_scores:
-            # Game over screen
-            screen.fill(BLACK)
-            
-            game_over_text = large_font.render("GAME OVER", True, RED)
-            screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 150))
-            
-            score_text = font.render(f"You survived for {survival_time:.1f} seconds", True, WHITE)
-            screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 250))
-            
-            # Get nickname and save score
-            nickname = get_nickname()
-            save_score(nickname, survival_time)
-            
-            game_over = False
-            show_high_scores = True
-        
-        elif show_high_scores:
-            # High scores screen
-            screen.fill(BLACK)
-            display_high_scores()
+def draw_poop_shape(surface, x, y, width, height, color):
+    # Draw a more detailed poop emoji
+    # Main body
+    pygame.draw.circle(surface, color, (x + width // 2, y + height // 2), width // 2)
+    
+    # Top part
+    pygame.draw.circle(surface, color, (x + width // 2, y + height // 4), width // 3)
+    
+    # Eyes (white part)
+    eye_size = width // 8
+    pygame.draw.circle(surface, WHITE, (x + width // 3, y + height // 3), eye_size)
+    pygame.draw.circle(surface, WHITE, (x + 2 * width // 3, y + height // 3), eye_size)
+    
+    # Pupils (black part)
+    pupil_size = eye_size // 2
+    pygame.draw.circle(surface, BLACK, (x + width // 3, y + height // 3), pupil_size)
+    pygame.draw.circle(surface, BLACK, (x + 2 * width // 3, y + height // 3), pupil_size)
+    
+    # Smile
+    smile_rect = pygame.Rect(x + width // 4, y + height // 2, width // 2, height // 4)
+    pygame.draw.arc(surface, BLACK, smile_rect, 0, math.pi, 2)
+
+def get_player_sprite(width, height, color, direction, animation_frame):
+    # Quantize the running cycle so every pose can be rendered ahead of time
+    if direction == 0:
+        pose = 0
+    else:
+        cycle = animation_frame * 2 / (2 * math.pi)
+        pose = int(round(cycle * PLAYER_ANIMATION_FRAMES)) % PLAYER_ANIMATION_FRAMES
+    
+    key = ("player", width, height, color, direction, pose)
+    if key not in sprite_cache:
+        # Bake the whole ring of poses for this direction at once
+        poses = 1 if direction == 0 else PLAYER_ANIMATION_FRAMES
+        for ring_pose in range(poses):
+            phase = 2 * math.pi * ring_pose / PLAYER_ANIMATION_FRAMES
+            leg_offset = 5 * math.sin(phase) if direction != 0 else 0
+            arm_offset = 5 * math.sin(phase + math.pi) if direction != 0 else 0
             
-            restart_text = font.render("Press R to play again", True, WHITE)
-            screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 500))
-        
-        pygame.display.flip()
-        clock.tick(60)
+            sprite = pygame.Surface((width + 2 * SPRITE_PADDING, height + 2 * SPRITE_PADDING), pygame.SRCALPHA)
+            draw_player_shape(sprite, SPRITE_PADDING, SPRITE_PADDING, width, height, color, leg_offset, arm_offset)
+            sprite_cache[("player", width, height, color, direction, ring_pose)] = display.convert(sprite)
+    return sprite_cache[key]
 
-if __name__ == "__main__":
-    main()
+def get_poop_sprite(width, height, color):
+    key = ("poop", width, height, color)
+    if key not in sprite_cache:
+        sprite = pygame.Surface((width + 2 * SPRITE_PADDING, height + 2 * SPRITE_PADDING), pygame.SRCALPHA)
+        draw_poop_shape(sprite, SPRITE_PADDING, SPRITE_PADDING, width, height, color)
+        sprite_cache[key] = display.convert(sprite)
+    return sprite_cache[key]
 
-class Player:
-    def __init__(self):
-        self.width = PLAYER_SIZE
-        self.height = PLAYER_SIZE
-        self.x = SCREEN_WIDTH // 2 - self.width // 2
-        self.y = SCREEN_HEIGHT - self.height - 10
-        self.speed = PLAYER_SPEED
-        self.color = BLUE
-        self.animation_frame = 0
-        self.animation_speed = 0.2
-    
-    def draw(self):
-        if player_image:
-            # If we have an image, use it
-            # Create a running animation effect by slightly rotating the image based on movement
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT] or keys[pygame.K_RIGHT]:
-                self.animation_frame += self.animation_speed
-                angle = 10 * math.sin(self.animation_frame)
-                rotated_image = pygame.transform.rotate(player_image, angle)
-                screen.blit(rotated_image, (self.x, self.y))
-            else:
-                screen.blit(player_image, (self.x, self.y))
-        else:
-            # Fallback to rectangle if image fails
-            pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
-    
-    def move(self, direction):
-        if direction == "left" and self.x > 0:
-            self.x -= self.speed
-        if direction == "right" and self.x < SCREEN_WIDTH - self.width:
-            self.x += self.speed
-    
-    def reset(self):
-        self.x = SCREEN_WIDTH // 2 - self.width // 2
-        self.animation_frame = 0
+def get_poop_rotation_atlas(width, height, color):
+    # Every rotation of the poop sprite, rendered once so spinning poops are
+    # just a lookup and a blit. All frames share one size so they can be
+    # centered the same way.
+    key = ("poop_rotation", width, height, color)
+    if key not in sprite_cache:
+        sprite = get_poop_sprite(width, height, color)
+        size = math.ceil(math.hypot(sprite.get_width(), sprite.get_height()))
+        atlas = []
+        for step in range(POOP_ROTATION_STEPS):
+            rotated = pygame.transform.rotate(sprite, 360 * step / POOP_ROTATION_STEPS)
+            frame = pygame.Surface((size, size), pygame.SRCALPHA)
+            frame.blit(rotated, ((size - rotated.get_width()) // 2, (size - rotated.get_height()) // 2))
+            atlas.append(display.convert(frame))
+        sprite_cache[key] = atlas
+    return sprite_cache[key]
 
-class Poop:
-    def __init__(self):
-        self.width = POOP_SIZE
-        self.height = POOP_SIZE
-        self.reset()
-        self.speed = POOP_SPEED
-        self.color = BROWN
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-3, 3)  # Random rotation speed
-    
-    def draw(self):
-        if poop_image:
-            # If we have an image, use it with rotation for a falling effect
-            self.rotation += self.rotation_speed
-            rotated_image = pygame.transform.rotate(poop_image, self.rotation)
-            # Get the rect of the rotated image to center it properly
-            rect = rotated_image.get_rect(center=(self.x + self.width//2, self.y + self.height//2))
-            screen.blit(rotated_image, rect.topleft)
-        else:
-            # Fallback to the original poop shape if image fails
-            pygame.draw.circle(screen, self.color, (self.x + self.width // 2, self.y + self.height // 2), self.width // 2)
-            pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height // 2))
-            pygame.draw.circle(screen, (160, 82, 45), (self.x + self.width // 4, self.y + self.height // 4), 5)
-            pygame.draw.circle(screen, (160, 82, 45), (self.x + 3 * self.width // 4, self.y + self.height // 3), 4)
-    
-    def move(self):
-        self.y += self.speed
-    
-    def reset(self):
-        self.x = random.randint(0, SCREEN_WIDTH - self.width)
-        self.y = -self.height
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-3, 3)  # New random rotation speed
-    
-    def is_off_screen(self):
-        return self.y > SCREEN_HEIGHT
+def draw_poop(x, y, rotation, width=POOP_SIZE, height=POOP_SIZE, color=BROWN):
+    if POOP_ROTATION:
+        # Pick the pre-rotated frame closest to the current angle
+        atlas = get_poop_rotation_atlas(width, height, color)
+        step = int(round(rotation * POOP_ROTATION_STEPS / 360)) % POOP_ROTATION_STEPS
+        sprite = atlas[step]
+        return display.blit(sprite, (x + (width - sprite.get_width()) // 2,
+                                     y + (height - sprite.get_height()) // 2))
+    else:
+        sprite = get_poop_sprite(width, height, color)
+        return display.blit(sprite, (x - SPRITE_PADDING, y - SPRITE_PADDING))
 
-def check_collision(player, poop):
-    # Use a slightly smaller collision box for better gameplay feel
-    collision_margin = 10
-    if (player.x + collision_margin < poop.x + poop.width - collision_margin and
-        player.x + player.width - collision_margin > poop.x + collision_margin and
-        player.y + collision_margin < poop.y + poop.height - collision_margin and
-        player.y + player.height - collision_margin > poop.y + collision_margin):
-        return True
-    return False
+def draw_player(player, alpha=1.0):
+    # Draw between the last two ticks so movement looks smooth at any frame rate
+    x = player.prev_x + (player.x - player.prev_x) * alpha
+    sprite = get_player_sprite(player.width, player.height, BLUE, player.direction, player.animation_frame)
+    return display.blit(sprite, (x - SPRITE_PADDING, player.y - SPRITE_PADDING))
+
+def draw_profiler_overlay(target, input_latch=None):
+    # Rolling frame-time percentiles per section, in the top right corner,
+    # plus input-to-present latency when there is an input latch to ask.
+    # target is display during play and screen on menus.
+    global small_font
+    report = profiler.report()
+    if not report:
+        return None
+    latency = input_latch.latency_percentiles() if input_latch else None
+    if latency:
+        report = report + [("input", *latency)]
+    if small_font is None:
+        small_font = load_font("monospace", 14)
+    x, y = SCREEN_WIDTH - 290, 10
+    area = pygame.Rect(x, y, 0, 0)
+    area.union_ip(text_cache.draw_glyphs(target, small_font, "ms           p50    p95    p99", WHITE, (x, y)))
+    for name, p50, p95, p99 in report:
+        y += 18
+        line = f"{name:<11} {p50 * 1000:6.2f} {p95 * 1000:6.2f} {p99 * 1000:6.2f}"
+        area.union_ip(text_cache.draw_glyphs(target, small_font, line, WHITE, (x, y)))
+    return area
 
 def get_high_scores():
-    if not os.path.exists(RANKING_FILE):
-        return []
-    
-    scores = []
-    try:
-        with open(RANKING_FILE, "r") as file:
-            for line in file:
-                parts = line.strip().split(",")
-                if len(parts) == 2:
-                    name, score = parts
-                    scores.append((name, float(score)))
-    except Exception as e:
-        print(f"Error reading scores: {e}")
-    
-    # Sort by score (highest first)
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return scores
+    return get_leaderboard().get_scores()
 
 def save_score(name, score):
-    scores = get_high_scores()
-    scores.append((name, score))
-    scores.sort(key=lambda x: x[1], reverse=True)
-    
+    # Returns the place the new score took in the full ranking, or None if
+    # it couldn't be saved
     try:
-        with open(RANKING_FILE, "w") as file:
-            for name, score in scores:
-                file.write(f"{name},{score}\n")
+        return get_leaderboard().add(name, score)
     except Exception as e:
         print(f"Error saving score: {e}")
+        return None
 
-def display_high_scores():
-    scores = get_high_scores()
+def display_high_scores(placement=None):
+    scores = get_leaderboard().top(5)  # Show top 5 scores
     y_pos = 200
     
-    title_text = large_font.render("HIGH SCORES", True, WHITE)
+    title_text = text_cache.render(large_font, "HIGH SCORES", WHITE)
     screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 120))
     
-    for i, (name, score) in enumerate(scores[:5]):  # Show top 5 scores
-        score_text = font.render(f"{i+1}. {name}: {score:.1f}s", True, WHITE)
+    for i, (name, score) in enumerate(scores):
+        score_text = text_cache.render(font, f"{i+1}. {name}: {score:.1f}s", WHITE)
         screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, y_pos))
         y_pos += 40
+    
+    # Where the last game landed in the full ranking
+    if placement:
+        rank, total = placement
+        place_text = text_cache.render(font, f"You placed #{rank:,} of {total:,}", WHITE)
+        screen.blit(place_text, (SCREEN_WIDTH // 2 - place_text.get_width() // 2, 440))
 
-def get_nickname():
-    nickname = ""
-    input_active = True
-    
-    while input_active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN and nickname:
-                    input_active = False
-                elif event.key == pygame.K_BACKSPACE:
-                    nickname = nickname[:-1]
-                elif event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-                elif len(nickname) < 10:  # Limit nickname length
-                    if event.unicode.isalnum() or event.unicode == "_":
-                        nickname += event.unicode
-        
-        # Clear screen
-        screen.fill(BLACK)
-        
-        # Display prompt
-        prompt_text = font.render("Enter your nickname:", True, WHITE)
-        screen.blit(prompt_text, (SCREEN_WIDTH // 2 - prompt_text.get_width() // 2, 200))
-        
-        # Display current input
-        input_text = font.render(nickname + "_", True, WHITE)
-        screen.blit(input_text, (SCREEN_WIDTH // 2 - input_text.get_width() // 2, 250))
-        
-        # Display instructions
-        instr_text = font.render("Press ENTER when done", True, WHITE)
-        screen.blit(instr_text, (SCREEN_WIDTH // 2 - instr_text.get_width() // 2, 300))
-        
-        pygame.display.flip()
-        clock.tick(30)
+def display_high_scores_screen(placement=None):
+    screen.fill(BLACK)
+    display_high_scores(placement)
     
+    restart_text = text_cache.render(font, "Press R to play again", WHITE)
+    screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 500))
+
+def edit_nickname(nickname, event):
+    # Applies one KEYDOWN to the nickname being typed
+    if event.key == pygame.K_BACKSPACE:
+        return nickname[:-1]
+    if len(nickname) < 10:  # Limit nickname length
+        if event.unicode.isalnum() or event.unicode == "_":
+            return nickname + event.unicode
     return nickname
 
+def display_nickname_entry(nickname):
+    # Clear screen
+    screen.fill(BLACK)
+    
+    # Display prompt
+    prompt_text = text_cache.render(font, "Enter your nickname:", WHITE)
+    screen.blit(prompt_text, (SCREEN_WIDTH // 2 - prompt_text.get_width() // 2, 200))
+    
+    # Display current input
+    input_text = text_cache.render(font, nickname + "_", WHITE)
+    screen.blit(input_text, (SCREEN_WIDTH // 2 - input_text.get_width() // 2, 250))
+    
+    # Display instructions
+    instr_text = text_cache.render(font, "Press ENTER when done", WHITE)
+    screen.blit(instr_text, (SCREEN_WIDTH // 2 - instr_text.get_width() // 2, 300))
+
+def quit_game(score_writer):
+    # Scores still queued are written out before the process exits
+    score_writer.close()
+    pygame.quit()
+    sys.exit()
+
 def main():
-    player = Player()
-    active_poops = []  # List to store active poops
+    init_display()
+    leaderboard = get_leaderboard()
+    score_writer = ScoreWriter(leaderboard)
+    input_latch = InputLatch(late_latch=LATE_LATCH)
     
-    game_over = False
+    # Fold scores appended by earlier sessions into a sorted snapshot
+    if leaderboard.needs_compaction():
+        score_writer.call(leaderboard.compact)
+    
+    state = GameState(GameConfig(poop_store=POOP_STORE), record=True)
+    state.profiler = profiler
+    
+    game_over = False  # Game ended, nickname being entered
     show_high_scores = False
-    start_time = time.time()
     survival_time = 0
-    spawn_counter = 0  # Counter for poop spawning
-    
-    # Initial poop generation to meet minimum requirement
-    for _ in range(MIN_ACTIVE_POOPS):
-        new_poop = Poop()
-        new_poop.y = random.randint(-300, -40)  # Stagger initial positions
-        active_poops.append(new_poop)
+    nickname = ""
+    accumulator = 0.0  # Real time not yet simulated
+    last_frame_time = time.perf_counter()
+    placement = None  # Placement of the last saved score
+    shown_menu = None  # What the menu on screen shows; it's only redrawn when this changes
+    woken_by = []  # Event that ended an idle wait, handled ahead of anything queued after it
+    
+    # Soak test: the autopilot presses the keys, the monitor watches for leaks
+    autopilot = monitor = None
+    if AUTOPILOT:
+        autopilot = Autopilot()
+        ranking_path = BINARY_RANKING_FILE if RANKING_FORMAT == "binary" else RANKING_FILE
+        monitor = SoakMonitor(ranking_path, SOAK_INTERVAL, csv_path=SOAK_CSV)
     
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
-                elif event.key == pygame.K_r and (game_over or show_high_scores):
-                    # Reset the game
-                    player.reset()
-                    active_poops.clear()
-                    # Initial poop generation to meet minimum requirement
-                    for _ in range(MIN_ACTIVE_POOPS):
-                        new_poop = Poop()
-                        new_poop.y = random.randint(-300, -40)  # Stagger initial positions
-                        active_poops.append(new_poop)
-                    game_over = False
-                    show_high_scores = False
-                    start_time = time.time()
-                    spawn_counter = 0
-        
-        if not game_over and not show_high_scores:
-            # Handle player movement
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
-                player.move("left")
-            if keys[pygame.K_RIGHT]:
-                player.move("right")
-            
-            # Spawn new poops to maintain the flow
-            spawn_counter += 1
-            if spawn_counter >= POOP_SPAWN_RATE and len(active_poops) < MAX_ACTIVE_POOPS:
-                new_poop = Poop()
-                active_poops.append(new_poop)
-                spawn_counter = 0
+        if autopilot:
+            autopilot.post_events(state, game_over, show_high_scores)
+        
+        with profiler.section("events"):
+            overlay_toggled = False  # F3 takes effect at end_frame(), after this frame is drawn
+            events = woken_by + pygame.event.get()
+            woken_by = []
+            for event in events:
+                # Arrow keys only ever steer the player
+                if input_latch.handle_event(event):
+                    continue
+                if event.type == pygame.QUIT:
+                    quit_game(score_writer)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    shown_menu = None  # Window was uncovered, show the menu again
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        quit_game(score_writer)
+                    elif event.key == pygame.K_F3:
+                        profiler.toggle()
+                        overlay_toggled = True
+                    elif game_over:
+                        if event.key == pygame.K_RETURN and nickname:
+                            # Saving happens on the writer thread; the
+                            # placement shows up as soon as it is known
+                            placement = score_writer.submit(nickname, survival_time)
+                            
+                            # Keep the inputs so the score can be verified later
+                            score_writer.call(save_replay, Replay.from_state(state, nickname))
+                            
+                            game_over = False
+                            show_high_scores = True
+                        else:
+                            nickname = edit_nickname(nickname, event)
+                    elif event.key == pygame.K_r and show_high_scores:
+                        # Reset the game
+                        state.reset()
+                        input_latch.reset()
+                        game_over = False
+                        show_high_scores = False
+                        accumulator = 0.0
+                        last_frame_time = time.perf_counter()
+        
+        playing = not game_over and not show_high_scores
+        redraw_menu = False
+        if playing:
+            shown_menu = None
+            # Simulate in fixed ticks for however much real time has passed,
+            # so the game plays the same no matter how long drawing takes
+            now = time.perf_counter()
+            accumulator += now - last_frame_time
+            last_frame_time = now
+            ticks_this_frame = 0
             
-            # Move and check all poops
-            poops_to_remove = []
-            for poop in active_poops:
-                poop.move()
-                
-                # Check if poop is off screen
-                if poop.is_off_screen():
-                    poops_to_remove.append(poop)
+            while accumulator >= TICK_DURATION and not game_over:
+                if ticks_this_frame == MAX_TICKS_PER_FRAME:
+                    # Drawing has fallen behind; see FRAME_SKIP_POLICY
+                    if FRAME_SKIP_POLICY != "catchup":
+                        accumulator = 0.0
+                    break
+                accumulator -= TICK_DURATION
+                ticks_this_frame += 1
                 
-                # Check for collision
-                if check_collision(player, poop):
+                if state.step(input_latch.snapshot()):
                     game_over = True
-                    survival_time = time.time() - start_time
-                    break
-            
-            # Remove poops that went off screen
-            for poop in poops_to_remove:
-                active_poops.remove(poop)
-            
-            # Ensure we maintain the minimum number of poops
-            while len(active_poops) < MIN_ACTIVE_POOPS:
-                new_poop = Poop()
-                active_poops.append(new_poop)
+                    survival_time = state.survival_time
+                    nickname = ""
             
             # Update timer
-            current_time = time.time() - start_time
+            current_time = state.survival_time
             
-            # Draw everything
-            screen.fill(BLACK)
-            player.draw()
-            for poop in active_poops:
-                poop.draw()
+            # Draw everything, blended between the last two ticks
+            alpha = min(accumulator / TICK_DURATION, 1.0)
+            display.begin_frame()
+            with profiler.section("draw_player"):
+                display.add(draw_player(state.player, alpha))
+            with profiler.section("draw_poops"):
+                for x, y, rotation in state.poops.positions(alpha):
+                    display.add(draw_poop(x, y, rotation))
             
             # Display timer and active poop count
-            timer_text = font.render(f"Time: {current_time:.1f}s", True, WHITE)
-            screen.blit(timer_text, (10, 10))
-            poop_text = font.render(f"Active Poops: {len(active_poops)}", True, WHITE)
-            screen.blit(poop_text, (10, 50))
-        
-        elif game_over and not show_high_scores:
-            # Game over screen
-            screen.fill(BLACK)
-            
-            game_over_text = large_font.render("GAME OVER", True, RED)
-            screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 150))
-            
-            score_text = font.render(f"You survived for {survival_time:.1f} seconds", True, WHITE)
-            screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 250))
-            
-            # Get nickname and save score
-            nickname = get_nickname()
-            save_score(nickname, survival_time)
-            
-            game_over = False
-            show_high_scores = True
+            with profiler.section("text"):
+                display.add(text_cache.draw_glyphs(display, font, f"Time: {current_time:.1f}s", WHITE, (10, 10)))
+                poop_text = text_cache.render(font, f"Active Poops: {len(state.poops)}", WHITE)
+                display.add(display.blit(poop_text, (10, 50)))
+                display.add(draw_profiler_overlay(display, input_latch))
         
-        elif show_high_scores:
-            # High scores screen
-            screen.fill(BLACK)
-            display_high_scores()
-            
-            restart_text = font.render("Press R to play again", True, WHITE)
-            screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, 500))
-        
-        pygame.display.flip()
-        clock.tick(60)
-
-# Import math module for animation
-import math
+        else:
+            # Menus only change on a keystroke or a leaderboard update, so
+            # they are drawn and flipped only when what they show changes
+            if game_over:
+                # Game over: nickname entry for the score
+                menu = ("nickname", nickname)
+            else:
+                menu = ("high_scores", tuple(get_leaderboard().top(5)), placement and placement.value)
+            redraw_menu = menu != shown_menu or profiler.enabled
+            if redraw_menu:
+                if game_over:
+                    screen_cache.show(screen, menu, lambda: display_nickname_entry(nickname))
+                else:
+                    screen_cache.show(screen, menu, lambda: display_high_scores_screen(menu[2]))
+                draw_profiler_overlay(screen)
+                shown_menu = menu
+        
+        with profiler.section("flip"):
+            if playing:
+                display.present()
+                input_latch.presented()
+            elif redraw_menu:
+                display.present_surface()
+        profiler.end_frame()
+        if overlay_toggled:
+            shown_menu = None  # Redraw a menu with or without the overlay
+        if monitor:
+            monitor.frame(playing, autopilot.games)
+        
+        if playing or profiler.enabled or shown_menu is None:
+            clock.tick(60)
+        else:
+            # Nothing on a menu changes until an event arrives, so sleep until
+            # one does. It is handled first in the next pass; posting it back
+            # would put it behind events that arrived after it.
+            event = pygame.event.wait(IDLE_WAKEUP_MS)
+            if event.type != pygame.NOEVENT:
+                woken_by = [event]
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,115 @@
+import random
+
+try:
+    import numpy as np
+except ImportError:  # Only needed for the array-backed store
+    np = None
+
+# Falling poops kept as parallel arrays instead of one object each, so moving,
+# culling and collision checks are a single vectorized pass no matter how
+# many are on screen. Dead entries are removed by swapping live ones from the
+# end of the arrays into their slots.
+class PoopStore:
+    FIELDS = ("x", "y", "speed", "rotation", "rotation_speed")
+    
+    def __init__(self, width, height, speed, screen_width, screen_height, capacity=256, rng=random):
+        if np is None:
+            raise ImportError("PoopStore needs numpy (pip install numpy)")
+        self.random = rng
+        self.width = width
+        self.height = height
+        self.default_speed = speed
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.count = 0  # Live entries are [0, count) in every array
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(capacity, dtype=np.float64))
+    
+    def __len__(self):
+        return self.count
+    
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for field in self.FIELDS:
+            old = getattr(self, field)
+            new = np.zeros(capacity, dtype=np.float64)
+            new[:self.count] = old[:self.count]
+            setattr(self, field, new)
+    
+    def clear(self):
+        self.count = 0
+    
+    def spawn(self, y=None):
+        # Always room (the arrays grow); returns True like PoopList.spawn
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = self.random.randint(0, self.screen_width - self.width)
+        self.y[i] = -self.height if y is None else y
+        self.speed[i] = self.default_speed
+        self.rotation[i] = 0
+        self.rotation_speed[i] = self.random.uniform(-3, 3)
+        self.count += 1
+        return True
+    
+    def update(self):
+        n = self.count
+        self.y[:n] += self.speed[:n]
+        self.rotation[:n] += self.rotation_speed[:n]
+        
+        # Drop poops that fell off the bottom
+        dead = np.flatnonzero(self.y[:n] > self.screen_height)
+        if len(dead):
+            self._swap_remove(dead)
+    
+    def _swap_remove(self, dead):
+        # Live entries from the tail move into the holes left below the new end
+        n = self.count
+        new_count = n - len(dead)
+        alive_tail = np.ones(n - new_count, dtype=bool)
+        alive_tail[dead[dead >= new_count] - new_count] = False
+        holes = dead[dead < new_count]
+        movers = np.flatnonzero(alive_tail) + new_count
+        for field in self.FIELDS:
+            array = getattr(self, field)
+            array[holes] = array[movers]
+        self.count = new_count
+    
+    def collides(self, player, margin):
+        return bool(self.collisions((player,), margin))
+    
+    def collisions(self, players, margin):
+        # Players hit by any poop. Same broad phase as PoopList: poops sit in
+        # columns one poop wide, and only those in the columns covering a
+        # player's shrunken hitbox get the same test as check_collision().
+        # Here the columns are a vectorized mask on x between the first
+        # column's left edge and the last one's right edge, not kept sets.
+        n = self.count
+        if not n or not players:
+            return []
+        all_x = self.x[:n]
+        hits = []
+        for player in players:
+            left = (player.x + 2 * margin - self.width) // self.width * self.width
+            right = ((player.x + player.width - 2 * margin) // self.width + 1) * self.width
+            near = np.flatnonzero((all_x >= left) & (all_x < right))
+            if not len(near):
+                continue
+            x = self.x[near]
+            y = self.y[near]
+            hit = ((player.x + margin < x + self.width - margin) &
+                   (player.x + player.width - margin > x + margin) &
+                   (player.y + margin < y + self.height - margin) &
+                   (player.y + player.height - margin > y + margin))
+            if hit.any():
+                hits.append(player)
+        return hits
+    
+    def positions(self, alpha=1.0):
+        # (x, y, rotation) of every live poop, as plain Python numbers for
+        # drawing. alpha blends between the previous tick (0) and this one (1).
+        n = self.count
+        behind = 1.0 - alpha
+        y = self.y[:n] - self.speed[:n] * behind
+        rotation = self.rotation[:n] - self.rotation_speed[:n] * behind
+        return zip(self.x[:n].tolist(), y.tolist(), rotation.tolist())
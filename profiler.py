@@ -0,0 +1,134 @@
+import atexit
+import time
+from array import array
+
+# Per-frame timings of the main loop's hot paths. Each named section adds up
+# the time spent in it during a frame; end_frame() stores those totals in a
+# ring buffer of the last `window` frames, from which rolling percentiles
+# are taken, and optionally appends them to a CSV file.
+
+SECTIONS = ("events", "player", "poops", "draw_player", "draw_poops", "text", "flip")
+
+def percentiles(values, points=(50, 95, 99)):
+    # Nearest-rank percentiles of values, or None if there are none
+    values = sorted(values)
+    if not values:
+        return None
+    return [values[min(len(values) - 1, len(values) * point // 100)] for point in points]
+
+class Window:
+    # The last `size` values added, in a preallocated ring buffer
+    def __init__(self, size):
+        self._values = array("d", bytes(8 * size))
+        self._index = 0
+        self._filled = 0
+    
+    def __len__(self):
+        return self._filled
+    
+    def append(self, value):
+        self._values[self._index] = value
+        self._index = (self._index + 1) % len(self._values)
+        self._filled = min(self._filled + 1, len(self._values))
+    
+    def values(self):
+        # Not in the order they were added once the buffer has wrapped
+        return self._values[:self._filled]
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.profiler.enabled:
+            self.profiler.totals[self.name] += time.perf_counter() - self.start
+        return False
+
+class FrameProfiler:
+    def __init__(self, sections=SECTIONS, window=600, csv_path=None, enabled=False, refresh_every=30):
+        self.sections = tuple(sections)
+        self.columns = self.sections + ("work", "frame")  # Busy time, and time between frames
+        self.window = window  # Frames kept for the percentiles
+        self.refresh_every = refresh_every  # Frames between report() recalculations
+        self.enabled = enabled
+        self.csv_path = csv_path
+        self.totals = dict.fromkeys(self.sections, 0.0)  # Time spent per section this frame
+        self._sections = {name: _Section(self, name) for name in self.sections}
+        self._history = {name: Window(window) for name in self.columns}
+        self._until_report = 1  # Frames left before report() is recalculated
+        self._last_frame_end = None
+        self._toggle_requested = False
+        self._report = []
+        self._csv = None
+    
+    def section(self, name):
+        # Use as "with profiler.section(name):"; costs almost nothing when disabled
+        return self._sections[name]
+    
+    def toggle(self):
+        # Applied at the end of the frame so no section is left half-timed
+        self._toggle_requested = True
+    
+    def end_frame(self):
+        now = time.perf_counter()
+        if self.enabled:
+            row = [self.totals[name] for name in self.sections]
+            work = sum(row)
+            row.append(work)
+            row.append(now - self._last_frame_end if self._last_frame_end is not None else work)
+            for name, value in zip(self.columns, row):
+                self._history[name].append(value)
+            for name in self.sections:
+                self.totals[name] = 0.0
+            self._write_csv_row(row)
+            self._until_report -= 1
+            if self._until_report <= 0:
+                self._report = self._build_report()
+                self._until_report = self.refresh_every
+        self._last_frame_end = now
+        
+        if self._toggle_requested:
+            self._toggle_requested = False
+            self.enabled = not self.enabled
+            for name in self.sections:
+                self.totals[name] = 0.0
+            self._until_report = 1
+            if not self.enabled:
+                self._report = []
+    
+    def percentiles(self, name, points=(50, 95, 99)):
+        return percentiles(self._history[name].values(), points) or [0.0 for _ in points]
+    
+    def _build_report(self):
+        return [(name,) + tuple(self.percentiles(name)) for name in self.columns]
+    
+    def report(self):
+        # [(section, p50, p95, p99), ...] in seconds, refreshed every refresh_every frames
+        return self._report
+    
+    def _write_csv_row(self, row):
+        if not self.csv_path:
+            return
+        try:
+            if self._csv is None:
+                self._csv = open(self.csv_path, "w")
+                self._csv.write(",".join(name + "_ms" for name in self.columns) + "\n")
+                atexit.register(self.close)
+            self._csv.write(",".join(f"{value * 1000:.3f}" for value in row) + "\n")
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            self.csv_path = None
+    
+    def close(self):
+        if self._csv is not None:
+            self._csv.close()
+            self._csv = None
@@ -0,0 +1,158 @@
+import os
+import weakref
+
+import pygame
+
+from dirty_rects import DirtyRectRenderer
+
+try:
+    from pygame._sdl2 import video
+except ImportError:  # pygame builds without the SDL2 video module; only "software" works then
+    video = None
+
+# Where frames end up on screen. The game always draws at its logical
+# resolution (800x600); the backend scales that to whatever the window is.
+#
+#   software      blits into a pygame surface, the way the game always has.
+#                 A bigger window means a software scale of every frame.
+#   gpu           pygame._sdl2.video Renderer: every sprite and text surface
+#                 is uploaded as a texture once, the GPU scales the frame to
+#                 the window and present() waits for vsync.
+#   sdl-software  the same Renderer path on SDL's software renderer, which
+#                 needs no GPU (dummy video driver, CI), and no vsync.
+#
+# Both take the same calls. During play: begin_frame(), blit() sprites and
+# text, add() the rects they return, present(). Menus are drawn in software
+# onto .surface and shown with present_surface().
+
+BACKENDS = ("software", "gpu", "sdl-software")
+
+def fit(logical_size, window_size):
+    # Largest rect with the game's aspect ratio, centered in the window
+    scale = min(window_size[0] / logical_size[0], window_size[1] / logical_size[1])
+    width, height = int(logical_size[0] * scale), int(logical_size[1] * scale)
+    return pygame.Rect((window_size[0] - width) // 2, (window_size[1] - height) // 2, width, height)
+
+class SoftwareBackend:
+    def __init__(self, logical_size, window_size, background, title, dirty_rects=False, fullscreen=False):
+        if fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(window_size)
+        pygame.display.set_caption(title)
+        self.background = background
+        
+        if self.window.get_size() == tuple(logical_size):
+            self.surface = self.window
+            self._viewport = None
+        else:
+            # Drawn at the logical size and scaled as a whole when presented;
+            # dirty rects save nothing when every pixel gets rescaled anyway
+            self.surface = pygame.Surface(logical_size).convert()
+            self._viewport = self.window.subsurface(fit(logical_size, self.window.get_size()))
+            dirty_rects = False
+        self._dirty = DirtyRectRenderer(self.surface, background, enabled=dirty_rects)
+    
+    def convert(self, sprite):
+        # Blits are fastest from the display's own pixel format
+        return sprite.convert_alpha()
+    
+    def begin_frame(self):
+        self._dirty.begin_frame()
+    
+    def blit(self, source, dest):
+        return self.surface.blit(source, dest)
+    
+    def add(self, rect):
+        self._dirty.add(rect)
+    
+    def invalidate(self):
+        self._dirty.invalidate()
+    
+    def present(self):
+        if self._viewport is None:
+            self._dirty.present()
+        else:
+            self._present_window()
+    
+    def present_surface(self):
+        # Something other than a game frame covered the whole surface, so the
+        # next game frame has to be a full redraw as well
+        self._dirty.invalidate()
+        self._present_window()
+    
+    def _present_window(self):
+        if self._viewport is not None:
+            pygame.transform.scale(self.surface, self._viewport.get_size(), self._viewport)
+        pygame.display.flip()
+
+class TextureBackend:
+    def __init__(self, logical_size, window_size, background, title, accelerated=True, vsync=True, fullscreen=False):
+        if video is None:
+            raise ImportError("The gpu renderer needs pygame 2 built with SDL2 video")
+        # Smooth scaling for non-integer factors like 800x600 -> 1080p
+        os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "linear")
+        self.window = video.Window(title, size=window_size, fullscreen_desktop=fullscreen)
+        try:
+            # Vsync is only offered by hardware renderers
+            self.renderer = video.Renderer(self.window, accelerated=1 if accelerated else 0,
+                                           vsync=vsync and accelerated)
+        except Exception:
+            self.window.destroy()  # So a software fallback doesn't open a second window
+            raise
+        # Drawing stays in game coordinates; the GPU scales (and letterboxes)
+        # the frame to the window
+        self.renderer.logical_size = tuple(logical_size)
+        self.renderer.draw_color = pygame.Color(background)
+        self.background = background
+        self.surface = pygame.Surface(logical_size)  # Menus are composed here in software
+        self._surface_texture = None
+        # Source surface -> its texture. Entries go away with the surface, so
+        # text dropped from the text cache doesn't keep a texture alive.
+        self._textures = weakref.WeakKeyDictionary()
+    
+    def convert(self, sprite):
+        # Turned into a texture on first draw, whatever its pixel format
+        return sprite
+    
+    def texture(self, source):
+        texture = self._textures.get(source)
+        if texture is None:
+            texture = self._textures[source] = video.Texture.from_surface(self.renderer, source)
+        return texture
+    
+    def begin_frame(self):
+        self.renderer.clear()
+    
+    def blit(self, source, dest):
+        rect = source.get_rect(topleft=dest)
+        self.texture(source).draw(dstrect=rect)
+        return rect
+    
+    def add(self, rect):
+        pass  # Every frame is drawn from scratch; the GPU doesn't care
+    
+    def invalidate(self):
+        pass
+    
+    def present(self):
+        self.renderer.present()
+    
+    def present_surface(self):
+        # The composed menu goes up as one texture, only when it changed
+        if self._surface_texture is None:
+            self._surface_texture = video.Texture(self.renderer, self.surface.get_size(), streaming=True)
+        self._surface_texture.update(self.surface)
+        self.renderer.clear()
+        self._surface_texture.draw()
+        self.renderer.present()
+
+def create_backend(name, logical_size, window_size=None, background=(0, 0, 0), title="",
+                   dirty_rects=False, fullscreen=False):
+    window_size = window_size or logical_size
+    if name == "software":
+        return SoftwareBackend(logical_size, window_size, background, title, dirty_rects, fullscreen)
+    if name in ("gpu", "sdl-software"):
+        return TextureBackend(logical_size, window_size, background, title,
+                              accelerated=name == "gpu", fullscreen=fullscreen)
+    raise ValueError(f"Unknown renderer {name!r}, expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+from game_state import GameConfig, GameState
+
+# Recorded games. A replay is everything needed to re-run a game tick for
+# tick: the config, the RNG seed and the input bitmask of every tick.
+#
+# File layout (little endian):
+#   header   magic "PDRP", version u8, seed u64, ticks u32, meta length u32
+#   meta     JSON: {"config": {...}, "name": ..., "score": ...}
+#   inputs   zlib-compressed, one byte per tick
+#
+#   python replay.py verify replays/*.pdr     re-simulate headlessly and check the score
+#   python replay.py watch FILE --speed 4     play it back on screen at 4x
+
+MAGIC = b"PDRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQII")
+REPLAY_DIR = "replays"
+
+class Replay:
+    def __init__(self, config, seed, inputs, name=None, score=None):
+        self.config = config
+        self.seed = seed
+        self.inputs = bytes(inputs)  # Input bitmask per tick
+        self.name = name
+        self.score = score  # Survival time that was claimed for this game
+    
+    @classmethod
+    def from_state(cls, state, name=None):
+        return cls(state.config, state.seed, state.inputs, name, state.survival_time)
+    
+    def to_bytes(self):
+        meta = json.dumps({"config": vars(self.config), "name": self.name, "score": self.score}).encode()
+        header = HEADER.pack(MAGIC, VERSION, self.seed, len(self.inputs), len(meta))
+        return header + meta + zlib.compress(self.inputs, 9)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ValueError("Replay file is truncated")
+        magic, version, seed, ticks, meta_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a replay file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+        meta_end = HEADER.size + meta_length
+        meta = json.loads(data[HEADER.size:meta_end])
+        inputs = zlib.decompress(data[meta_end:])
+        if len(inputs) != ticks:
+            raise ValueError("Replay input log is truncated")
+        return cls(GameConfig(**meta["config"]), seed, inputs, meta.get("name"), meta.get("score"))
+    
+    def save(self, path):
+        # Temp file + rename so a crash can't leave a half-written replay
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self.to_bytes())
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+def save_replay(replay, directory=REPLAY_DIR):
+    # Named after the leaderboard entry it backs up, e.g. replays/bob_42.3_1700000000.pdr
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{replay.name}_{replay.score:.1f}_{int(time.time())}.pdr")
+        replay.save(path)
+        return path
+    except Exception as e:
+        print(f"Error saving replay: {e}")
+        return None
+
+def simulate(replay):
+    # Re-run the game headlessly; returns the final state
+    state = GameState(replay.config, seed=replay.seed)
+    for inputs in replay.inputs:
+        if state.step(inputs):
+            break
+    return state
+
+def verify(replay):
+    # A replay is genuine when re-simulating it dies on exactly its last tick
+    # and gives the score that was claimed
+    state = simulate(replay)
+    problems = []
+    if not state.game_over:
+        problems.append("game does not end where the recording does")
+    elif state.ticks != len(replay.inputs):
+        problems.append(f"game ends at tick {state.ticks} but {len(replay.inputs)} ticks were recorded")
+    if replay.score is not None and abs(state.survival_time - replay.score) > 1e-9:
+        problems.append(f"claimed {replay.score:.1f}s but the replay survives {state.survival_time:.1f}s")
+    return state, problems
+
+def watch(replay, speed=1.0):
+    # Play a replay back in the game window. Imported here so verifying
+    # replays never needs a display.
+    import pygame
+    import poop_dodge_game as game
+    
+    game.init_display()
+    state = GameState(replay.config, seed=replay.seed)
+    ticks_per_second = replay.config.tick_rate * speed
+    start = time.perf_counter()
+    tick = 0
+    while tick < len(replay.inputs) and not state.game_over:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return state
+        
+        # Catch the simulation up with the playback clock
+        target = min(len(replay.inputs), int((time.perf_counter() - start) * ticks_per_second))
+        while tick < target and not state.game_over:
+            state.step(replay.inputs[tick])
+            tick += 1
+        
+        # Full frames every time; nothing here tracks dirty rects
+        game.display.invalidate()
+        game.display.begin_frame()
+        game.draw_player(state.player)
+        for x, y, rotation in state.poops.positions():
+            game.draw_poop(x, y, rotation)
+        label = f"Replay {replay.name or ''} x{speed:g}  Time: {state.survival_time:.1f}s"
+        game.display.blit(game.text_cache.render(game.font, label, game.WHITE), (10, 10))
+        game.display.present()
+        game.clock.tick(60)
+    return state
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or watch recorded games.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    verify_parser = commands.add_parser("verify", help="Re-simulate replays headlessly and check their scores")
+    verify_parser.add_argument("paths", nargs="+")
+    watch_parser = commands.add_parser("watch", help="Play a replay back on screen")
+    watch_parser.add_argument("path")
+    watch_parser.add_argument("--speed", type=float, default=1.0, help="Playback speed multiplier")
+    args = parser.parse_args(argv)
+    
+    if args.command == "watch":
+        state = watch(Replay.load(args.path), args.speed)
+        print(f"Survived {state.survival_time:.1f}s")
+        return 0
+    
+    failures = 0
+    for path in args.paths:
+        start = time.perf_counter()
+        try:
+            replay = Replay.load(path)
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"{path}: unreadable ({e})")
+            failures += 1
+            continue
+        state, problems = verify(replay)
+        elapsed = time.perf_counter() - start
+        rate = state.ticks / elapsed if elapsed else 0
+        if problems:
+            failures += 1
+            print(f"{path}: SUSPICIOUS {replay.name}: " + "; ".join(problems))
+        else:
+            print(f"{path}: ok {replay.name} {state.survival_time:.1f}s ({state.ticks} ticks, {rate:,.0f} ticks/s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
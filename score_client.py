@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+import uuid
+
+from score_server import DEFAULT_PORT
+
+# Game side of score_server.py. ScoreClient keeps a small pool of open
+# connections and pipelines requests over them: a request is written as soon
+# as it is made and matched to its reply by id, never waiting for the ones
+# before it.
+#
+# RemoteLeaderboard wraps it in the interface of leaderboard.Leaderboard, so
+# the game can use a shared server instead of its own ranking file. While the
+# server can't be reached every call falls back to the local leaderboard
+# (ranking.txt), and scores saved that way are sent on once it is back.
+# Every score carries an id picked here, so sending one again after a lost
+# or late reply can't put it on the server twice.
+
+class _Connection:
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._waiting = {}  # Request id -> future for its reply
+        self._ids = itertools.count(1)
+        self._read_task = None
+    
+    @property
+    def is_open(self):
+        return self._writer is not None and not self._writer.is_closing()
+    
+    async def open(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        self._read_task = asyncio.create_task(self._read_replies())
+    
+    async def request(self, message):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        try:
+            self._writer.write(json.dumps(dict(message, id=request_id)).encode() + b"\n")
+            await self._writer.drain()
+            reply = await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._waiting.pop(request_id, None)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply
+    
+    async def _read_replies(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self._waiting.get(reply.get("id"))
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.close()
+    
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Score server connection closed"))
+
+class ScoreClient:
+    def __init__(self, host, port=DEFAULT_PORT, pool_size=2, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout  # Seconds before a connect or a reply counts as failed
+        self._pool = [_Connection(host, port, timeout) for _ in range(pool_size)]
+        self._next = itertools.cycle(range(pool_size))
+        self._opening = {}  # Connection index -> task opening it
+    
+    async def request(self, message):
+        index = next(self._next)
+        connection = self._pool[index]
+        if not connection.is_open:
+            # Concurrent requests on a closed connection share one reconnect
+            if index not in self._opening:
+                connection = self._pool[index] = _Connection(self.host, self.port, self.timeout)
+                self._opening[index] = asyncio.create_task(connection.open())
+            opening = self._opening[index]
+            try:
+                await asyncio.shield(opening)
+            finally:
+                if opening.done():
+                    self._opening.pop(index, None)
+            connection = self._pool[index]
+        return await connection.request(message)
+    
+    async def submit(self, name, score, submission_id=None):
+        message = {"op": "submit", "name": name, "score": score}
+        if submission_id is not None:
+            message["sid"] = submission_id
+        reply = await self.request(message)
+        return reply["rank"], reply["count"]
+    
+    async def top(self, count=None):
+        reply = await self.request({"op": "top", "count": count})
+        return [(name, score) for name, score in reply["scores"]]
+    
+    async def rank(self, score):
+        reply = await self.request({"op": "rank", "score": score})
+        return reply["rank"], reply["count"]
+    
+    def close(self):
+        for connection in self._pool:
+            connection.close()
+
+class RemoteLeaderboard:
+    def __init__(self, host, port=DEFAULT_PORT, local=None, size=5, refresh_interval=1.0,
+                 query_timeout=0.2, retry_interval=5.0, pool_size=2):
+        self.local = local  # Leaderboard used while the server can't be reached
+        self.size = size
+        self.refresh_interval = refresh_interval  # Seconds between top() refreshes
+        self.query_timeout = query_timeout  # Longest rank()/count() may block the caller
+        self.retry_interval = retry_interval  # Seconds between reconnects while offline
+        self.online = False
+        self._offline_since = None
+        self._top = None  # Last top list from the server
+        self._count = None
+        self._last_refresh = 0
+        self._refreshing = False
+        self._outbox = []  # (id, name, score) not confirmed by the server, sent on reconnect
+        self._lock = threading.Lock()
+        
+        # The client's event loop runs on its own thread; the game only ever
+        # hands it coroutines
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="score-client", daemon=True)
+        self._thread.start()
+        self.client = ScoreClient(host, port, pool_size)
+    
+    def _run(self, coroutine, timeout):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+    
+    def _should_try(self):
+        return self.online or self._offline_since is None or \
+            time.monotonic() - self._offline_since >= self.retry_interval
+    
+    def _went_offline(self, e):
+        if self.online or self._offline_since is None:
+            print(f"Error reaching score server: {e!r}")
+        self.online = False
+        self._offline_since = time.monotonic()
+    
+    def _went_online(self):
+        self.online = True
+        self._offline_since = None
+    
+    def add(self, name, score):
+        return self.add_many([(name, score)])[0]
+    
+    def add_many(self, records):
+        # Blocks until the server has written the scores, so call it from a
+        # background thread (ScoreWriter). Scores the server didn't confirm
+        # go to the local file and stay in the outbox.
+        submissions = [(uuid.uuid4().hex, name, score) for name, score in records]
+        replies = [None] * len(submissions)
+        failed = submissions
+        if self._should_try():
+            with self._lock:
+                outbox, self._outbox = self._outbox, []
+            pending = outbox + submissions
+            try:
+                # Everything goes out pipelined; the server batches it into one write
+                all_replies = self._run(self._submit_all(pending), self.client.timeout * 2)
+            except Exception as e:
+                # No telling which ones got saved; the ids make resending them safe
+                all_replies = [e] * len(pending)
+            failed = [submission for submission, reply in zip(pending, all_replies) if isinstance(reply, Exception)]
+            replies = all_replies[len(outbox):]
+            
+            saved = [reply for reply in all_replies if not isinstance(reply, Exception)]
+            if saved:
+                self._last_refresh = 0  # Show the new scores in top() soon
+                self._count = max(count for _, count in saved)
+            if failed:
+                self._went_offline(next(reply for reply in all_replies if isinstance(reply, Exception)))
+            else:
+                self._went_online()
+        
+        with self._lock:
+            self._outbox[:0] = failed
+        unsaved = [(name, score) for (_, name, score), reply in zip(submissions, replies)
+                   if reply is None or isinstance(reply, Exception)]
+        local_ranks = iter(self.local.add_many(unsaved) if self.local is not None and unsaved else [])
+        return [next(local_ranks, None) if reply is None or isinstance(reply, Exception) else reply[0]
+                for reply in replies]
+    
+    async def _submit_all(self, submissions):
+        # Failures come back in place of their reply, so the others still count
+        return await asyncio.gather(*(self.client.submit(name, score, submission_id)
+                                      for submission_id, name, score in submissions), return_exceptions=True)
+    
+    def top(self, count=None):
+        # Never blocks: answers from the last list fetched and refreshes it
+        # in the background every refresh_interval
+        now = time.monotonic()
+        if not self._refreshing and now - self._last_refresh >= self.refresh_interval and self._should_try():
+            self._refreshing = True
+            self._last_refresh = now
+            asyncio.run_coroutine_threadsafe(self._refresh_top(), self._loop)
+        if self._top is None or not self.online:
+            top = self.local.top(self.size) if self.local is not None else []
+        else:
+            top = self._top
+        return top if count is None else top[:count]
+    
+    async def _refresh_top(self):
+        try:
+            self._top = await self.client.top(self.size)
+            self._went_online()
+        except Exception as e:
+            self._went_offline(e)
+        finally:
+            self._refreshing = False
+    
+    def rank(self, score):
+        # Waits at most query_timeout for the server
+        if self._should_try():
+            try:
+                rank, self._count = self._run(self.client.rank(score), self.query_timeout)
+                self._went_online()
+                return rank
+            except Exception as e:
+                self._went_offline(e)
+        return self.local.rank(score) if self.local is not None else None
+    
+    def placement(self, score):
+        # Never waits for the server, since it is asked on the render thread:
+        # while offline the local file answers, otherwise the rank comes back
+        # with the write
+        if not self._should_try() and self.local is not None:
+            return self.local.placement(score)
+        return None
+    
+    def count(self):
+        if self.online and self._count is not None:
+            return self._count
+        return self.local.count() if self.local is not None else 0
+    
+    def get_scores(self):
+        # Only the top entries travel over the network
+        return self.top()
+    
+    def needs_compaction(self):
+        return self.local is not None and self.local.needs_compaction()
+    
+    def compact(self):
+        return self.local.compact() if self.local is not None else False
+    
+    def close(self):
+        self._loop.call_soon_threadsafe(self.client.close)
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import json
+import sys
+from collections import OrderedDict
+
+from binary_ranking import BinaryLeaderboard
+from leaderboard import Leaderboard
+
+# Shared leaderboard for every machine on the LAN. Games connect with
+# score_client.RemoteLeaderboard and send one JSON object per line:
+#
+#   {"id": 1, "op": "submit", "name": "bob", "score": 42.3, "sid": "9f2c..."}
+#                                                            -> {"id": 1, "rank": 7, "count": 1200}
+#   {"id": 2, "op": "top", "count": 5}                       -> {"id": 2, "scores": [["amy", 61.0], ...]}
+#   {"id": 3, "op": "rank", "score": 42.3}                   -> {"id": 3, "rank": 7, "count": 1200}
+#
+# Requests on a connection may be pipelined; each reply carries the id of
+# its request and replies can come back in any order. Failures come back as
+# {"id": ..., "error": "..."}.
+#
+# "sid" is an optional id the client picks for each score. A client that
+# didn't hear back sends the score again with the same sid; the server
+# remembers recent sids and answers a resend with the first result instead
+# of saving the score twice.
+#
+# Submissions are collected for batch_delay seconds (or until batch_size of
+# them are waiting) and written with a single append and fsync, so 40
+# cabinets submitting at once cost one disk write, not 40. Rankings are
+# answered from the leaderboard's in-memory index without touching the disk.
+#
+#   python score_server.py --host 0.0.0.0 --port 5050
+
+DEFAULT_PORT = 5050
+
+class ScoreServer:
+    def __init__(self, leaderboard, batch_size=256, batch_delay=0.05, remembered_ids=100000):
+        self.leaderboard = leaderboard
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay  # Seconds to wait for more submissions before writing
+        self.remembered_ids = remembered_ids  # Submission ids kept for recognizing resends
+        self._submissions = asyncio.Queue()
+        self._by_id = OrderedDict()  # Submission id -> future of its rank, oldest first
+        self._writer_task = None
+    
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._writer_task = asyncio.create_task(self._write_batches())
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Score server listening on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+        async with server:
+            await server.serve_forever()
+    
+    async def submit(self, name, score, submission_id=None):
+        # Resolves once the score is on disk, with the rank it got. A
+        # submission id seen before gets the first one's rank, saved once.
+        if submission_id is not None and submission_id in self._by_id:
+            return await asyncio.shield(self._by_id[submission_id])
+        
+        future = asyncio.get_running_loop().create_future()
+        if submission_id is not None:
+            self._by_id[submission_id] = future
+            if len(self._by_id) > self.remembered_ids:
+                self._by_id.popitem(last=False)
+        await self._submissions.put((name, score, future))
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Not saved, so a resend has to be saved for real
+            if submission_id is not None and self._by_id.get(submission_id) is future:
+                del self._by_id[submission_id]
+            raise
+    
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._submissions.get()]
+            await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not self._submissions.empty():
+                batch.append(self._submissions.get_nowait())
+            
+            # The file write happens on a worker thread, so queries keep being
+            # answered while it is fsynced
+            try:
+                ranks = await loop.run_in_executor(
+                    None, self.leaderboard.add_many, [(name, score) for name, score, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), rank in zip(batch, ranks):
+                future.set_result(rank)
+    
+    async def _handle_connection(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Every request runs on its own so a pipelined submit waiting
+                # for its batch doesn't hold up the queries behind it
+                task = asyncio.create_task(self._reply(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+    
+    async def _reply(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            reply = await self._dispatch(request)
+        except Exception as e:
+            reply = {"error": str(e)}
+        reply["id"] = request_id
+        if not writer.is_closing():
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+    
+    async def _dispatch(self, request):
+        # top() and rank() can wait on the leaderboard lock while a batch
+        # is written, so they run on a worker thread like the writes do
+        loop = asyncio.get_running_loop()
+        op = request.get("op")
+        if op == "submit":
+            name = str(request["name"])[:10]  # Same limit as nickname entry
+            rank = await self.submit(name, float(request["score"]), request.get("sid"))
+            return {"rank": rank, "count": self.leaderboard.count()}
+        if op == "top":
+            return {"scores": await loop.run_in_executor(None, self.leaderboard.top, request.get("count"))}
+        if op == "rank":
+            rank = await loop.run_in_executor(None, self.leaderboard.rank, float(request["score"]))
+            return {"rank": rank, "count": self.leaderboard.count()}
+        if op == "count":
+            return {"count": self.leaderboard.count()}
+        raise ValueError(f"Unknown op {op!r}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve one leaderboard to every game on the network.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (0.0.0.0 for the whole LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--file", default=None, help="Ranking file (default ranking.txt or ranking.bin)")
+    parser.add_argument("--format", choices=("text", "binary"), default="text")
+    parser.add_argument("--top", type=int, default=100, help="Entries kept for top queries")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--batch-delay", type=float, default=0.05, help="Seconds submissions are collected before a write")
+    args = parser.parse_args(argv)
+    
+    if args.format == "binary":
+        leaderboard = BinaryLeaderboard(args.file or "ranking.bin", size=args.top)
+    else:
+        leaderboard = Leaderboard(args.file or "ranking.txt", size=args.top)
+    if leaderboard.needs_compaction():
+        leaderboard.compact()
+    
+    server = ScoreServer(leaderboard, args.batch_size, args.batch_delay)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+from collections import OrderedDict
+
+# Whole composed screens (nickname entry, high scores), keyed by everything
+# they show. A menu that is shown again is copied back in one blit instead
+# of being cleared and redrawn text by text.
+class ScreenCache:
+    def __init__(self, max_size=4):
+        self.max_size = max_size  # Full-window surfaces are big; keep only a few
+        self._screens = OrderedDict()
+    
+    def show(self, target, key, draw):
+        # Puts the screen for key on target, calling draw() to compose it
+        # onto target the first time
+        surface = self._screens.get(key)
+        if surface is not None:
+            self._screens.move_to_end(key)
+            target.blit(surface, (0, 0))
+            return
+        
+        draw()
+        self._screens[key] = target.copy()
+        if len(self._screens) > self.max_size:
+            self._screens.popitem(last=False)
+    
+    def clear(self):
+        self._screens.clear()
@@ -0,0 +1,189 @@
+import csv
+import gc
+import os
+import random
+import time
+from array import array
+
+import pygame
+
+from bots import DodgeBot
+from game_state import INPUT_LEFT, INPUT_RIGHT
+from profiler import percentiles
+
+# Soak testing for the real game loop (POOP_AUTOPILOT=1). Autopilot plays
+# with DodgeBot by posting the same key events a player would cause: arrow
+# keys during play, a nickname and Enter at game over, R on the high
+# scores, forever. SoakMonitor samples the process every interval and
+# warns when something keeps growing over hours of uptime.
+#
+#   POOP_AUTOPILOT=1 POOP_SOAK_INTERVAL=60 POOP_SOAK_CSV=soak.csv python poop_dodge_game.py
+#
+# Every game's score is saved like a real one, so run it on a copy of the
+# ranking file rather than a kiosk's own.
+
+ARROW_KEYS = ((INPUT_LEFT, pygame.K_LEFT), (INPUT_RIGHT, pygame.K_RIGHT))
+
+# Sampled values watched for upward trends, as (name, unit). The ranking
+# file grows by a line every game on purpose, so what is watched is how
+# many bytes each saved game added to it since the soak started.
+TRENDED = (("rss_mb", "MB"), ("objects", "objects"), ("ranking_bytes_per_game", "bytes"), ("frame_p95_ms", "ms"))
+
+def post_key(event_type, key, unicode=""):
+    pygame.event.post(pygame.event.Event(event_type, key=key, unicode=unicode, mod=0, scancode=0))
+
+class Autopilot:
+    def __init__(self, nickname="autopilot", menu_delay=1.0, rng=None):
+        self.bot = DodgeBot(rng or random.Random())
+        self.nickname = nickname
+        self.menu_delay = menu_delay  # Seconds each menu stays up, so menu idling is part of the soak
+        self.held = 0  # Arrow keys we have down
+        self.games = 0
+        self._menu_since = None
+    
+    def post_events(self, state, game_over, show_high_scores):
+        # Call once per frame, before the event loop reads the queue
+        if not game_over and not show_high_scores:
+            self._menu_since = None
+            self._hold(self.bot(state))
+            return
+        
+        self._hold(0)
+        now = time.monotonic()
+        if self._menu_since is None:
+            self._menu_since = now
+        if now - self._menu_since < self.menu_delay:
+            return
+        self._menu_since = None
+        if game_over:
+            for char in self.nickname:
+                post_key(pygame.KEYDOWN, ord(char), char)
+            post_key(pygame.KEYDOWN, pygame.K_RETURN, "\r")
+            self.games += 1
+        else:
+            post_key(pygame.KEYDOWN, pygame.K_r, "r")
+    
+    def _hold(self, inputs):
+        for bit, key in ARROW_KEYS:
+            if inputs & bit and not self.held & bit:
+                post_key(pygame.KEYDOWN, key)
+            elif self.held & bit and not inputs & bit:
+                post_key(pygame.KEYUP, key)
+        self.held = inputs
+
+def rss_bytes():
+    # Resident set size right now. Only Linux has /proc; elsewhere there is
+    # no cheap portable way, so RSS isn't tracked there.
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def slope(points):
+    # Least-squares slope of (x, y) points
+    count = len(points)
+    mean_x = sum(x for x, _ in points) / count
+    mean_y = sum(y for _, y in points) / count
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+class SoakMonitor:
+    def __init__(self, ranking_path, interval=60.0, warmup=3, min_samples=10, growth_limit=0.1, csv_path=None):
+        self.ranking_path = ranking_path
+        self.interval = interval  # Seconds between samples
+        self.warmup = warmup  # Samples left out of trends while caches fill up
+        self.min_samples = min_samples  # Samples after the warm-up before anything is called a trend
+        self.growth_limit = growth_limit  # Rise over the samples, relative to their average, that gets flagged
+        self.csv_path = csv_path
+        self.samples = []
+        self._start = time.perf_counter()
+        self._ranking_start = self._ranking_size()
+        self._next_sample = self._start + interval
+        self._frame_times = array("d")  # Seconds, game frames since the last sample
+        self._last_frame = None
+    
+    def frame(self, playing, games=0):
+        # Call once per loop iteration. Only game frames are timed; menus
+        # sleep while waiting for input.
+        now = time.perf_counter()
+        if playing and self._last_frame is not None:
+            self._frame_times.append(now - self._last_frame)
+        self._last_frame = now if playing else None
+        if now >= self._next_sample:
+            self._next_sample = now + self.interval
+            self.sample(now, games)
+    
+    def sample(self, now, games):
+        times = self._frame_times
+        self._frame_times = array("d")
+        frame_ms = [value * 1000 for value in percentiles(times)] if times else [None] * 3
+        
+        rss = rss_bytes()
+        ranking_bytes = self._ranking_size()
+        sample = {
+            "seconds": now - self._start,
+            "games": games,
+            "rss_mb": rss / 2 ** 20 if rss is not None else None,
+            "objects": len(gc.get_objects()),
+            "ranking_bytes": ranking_bytes,
+            "ranking_bytes_per_game": (ranking_bytes - self._ranking_start) / games if games else None,
+            "frames": len(times),
+            "frame_p50_ms": frame_ms[0],
+            "frame_p95_ms": frame_ms[1],
+            "frame_p99_ms": frame_ms[2],
+        }
+        self.samples.append(sample)
+        self._write_csv_row(sample)
+        
+        frame_p95 = f"{sample['frame_p95_ms']:.2f}" if times else "-"
+        rss_mb = f"{sample['rss_mb']:.1f}" if rss is not None else "-"
+        # Flushed right away: soak runs are usually logged to a file and killed
+        print(f"Soak {sample['seconds'] / 3600:6.2f}h  games {games}  rss {rss_mb} MB  "
+              f"objects {sample['objects']}  ranking {ranking_bytes} bytes  frame p95 {frame_p95} ms", flush=True)
+        for warning in self.trends():
+            print(f"Soak warning: {warning}", flush=True)
+        return sample
+    
+    def trends(self):
+        # Values that kept going up after the warm-up, as readable warnings.
+        # A trend is a least-squares rise of more than growth_limit over all
+        # samples, with the later half of them higher than the earlier half,
+        # so a single spike or a noisy few minutes don't count.
+        samples = self.samples[self.warmup:]
+        warnings = []
+        for name, unit in TRENDED:
+            points = [(sample["seconds"] / 3600, sample[name]) for sample in samples if sample[name] is not None]
+            if len(points) < self.min_samples:
+                continue
+            half = len(points) // 2
+            average = sum(y for _, y in points) / len(points)
+            earlier = sum(y for _, y in points[:half]) / half
+            later = sum(y for _, y in points[half:]) / (len(points) - half)
+            per_hour = slope(points)
+            rise = per_hour * (points[-1][0] - points[0][0])
+            if average and later > earlier and rise / average > self.growth_limit:
+                warnings.append(f"{name} is rising {per_hour:,.2f} {unit}/hour "
+                                f"({rise / average:+.0%} over the last {points[-1][0] - points[0][0]:.1f}h)")
+        return warnings
+    
+    def _ranking_size(self):
+        try:
+            return os.path.getsize(self.ranking_path)
+        except OSError:
+            return 0
+    
+    def _write_csv_row(self, sample):
+        if not self.csv_path:
+            return
+        try:
+            new_file = not os.path.exists(self.csv_path)
+            with open(self.csv_path, "a", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=list(sample))
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(sample)
+        except Exception as e:
+            print(f"Error writing soak log: {e}")
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+import pygame
+
+# Rendered text surfaces, so labels that don't change are rasterized once
+# instead of on every frame
+class TextCache:
+    def __init__(self, max_size=256):
+        self.max_size = max_size  # Least recently used strings are dropped past this
+        self._surfaces = OrderedDict()
+        self._glyphs = {}  # Single characters, used to compose text that changes every frame
+    
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+        
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+    
+    def glyph(self, font, char, color, antialias=True):
+        key = (font, char, color, antialias)
+        surface = self._glyphs.get(key)
+        if surface is None:
+            surface = font.render(char, antialias, color)
+            self._glyphs[key] = surface
+        return surface
+    
+    def draw_glyphs(self, target, font, text, color, position, antialias=True):
+        # Blit text one cached character at a time. Meant for counters like
+        # the timer, where every frame is a new string but only a handful
+        # of different characters ever show up.
+        x, y = position
+        height = 0
+        for char in text:
+            surface = self.glyph(font, char, color, antialias)
+            target.blit(surface, (x, y))
+            x += surface.get_width()
+            height = max(height, surface.get_height())
+        return pygame.Rect(position[0], y, x - position[0], height)
+    
+    def clear(self):
+        self._surfaces.clear()
+        self._glyphs.clear()